@@ -49,7 +49,7 @@ def main():
         print("\nBacked up files:")
         print("  - Raw data: backup/raw/")
         print("  - Processed data: backup/processed/")
-        print("  - Database: backup/igs_data.db")
+        print("  - Database: backup/igs_data.db.gz")
         return 0
     else:
         print("\n" + "=" * 60)
@@ -3,8 +3,13 @@ Backend Server Launcher
 CIS 301 Capstone Project - Clark Atlanta CIS301
 
 Starts the FastAPI backend server
+
+Usage:
+    python run_backend.py         # one worker per CPU core
+    python run_backend.py --dev   # single worker with auto-reload
 """
 
+import os
 import uvicorn
 import sys
 from pathlib import Path
@@ -22,11 +27,15 @@ if __name__ == "__main__":
     print("[INFO] API documentation at: http://localhost:8000/docs")
     print("[INFO] Press CTRL+C to stop the server\n")
     
+    dev_mode = "--dev" in sys.argv
+    
+    # uvicorn[standard] ships uvloop and httptools; uvloop has no Windows build
     uvicorn.run(
         "backend.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=dev_mode,
+        workers=1 if dev_mode else os.cpu_count(),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
-
-
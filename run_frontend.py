@@ -5,10 +5,10 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 Starts the Streamlit dashboard
 """
 
-import subprocess
-import sys
 from pathlib import Path
 
+from streamlit.web import bootstrap
+
 if __name__ == "__main__":
     print("=" * 60)
     print("Starting IGS Data Dashboard")
@@ -21,15 +21,10 @@ if __name__ == "__main__":
     # Path to the main app
     app_path = Path(__file__).parent / "src" / "frontend" / "app.py"
     
-    # Run Streamlit
-    subprocess.run([
-        sys.executable,
-        "-m",
-        "streamlit",
-        "run",
-        str(app_path),
-        "--server.port=8501",
-        "--server.address=localhost"
-    ])
-
-
+    # Run Streamlit in this interpreter instead of spawning a second one
+    flag_options = {
+        "server.port": 8501,
+        "server.address": "localhost"
+    }
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(str(app_path), None, [], flag_options)
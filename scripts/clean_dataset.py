@@ -9,15 +9,44 @@ This script cleans the raw IGS dataset by:
 2. Setting proper column headers
 3. Handling N/A values
 4. Type conversions
-5. Saving cleaned data to processed/ directory
+5. Saving cleaned data to processed/ directory (CSV and Parquet)
 """
 
-import pandas as pd
+import csv
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import os
 
 # File paths
 RAW_DATA_PATH = os.path.join('data', 'raw', 'IGS-score.csv')
 PROCESSED_DATA_PATH = os.path.join('data', 'processed', 'IGS-score-cleaned.csv')
+PROCESSED_PARQUET_PATH = os.path.join('data', 'processed', 'IGS-score-cleaned.parquet')
+
+# Bytes of raw CSV parsed per streamed block
+BLOCK_SIZE = 16 * 1024 * 1024
+
+# Maximum rows per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+# Column types match the Parquet file written by the ETL pipeline
+# (IGSDataCleaner.save_cleaned_data), since the database loader and the
+# DuckDB analytics view read the same file
+CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+IDENTIFIER_COLUMN_TYPES = {
+    'Is an Opportunity Zone': CATEGORY_TYPE,
+    'Census Tract FIPS code': pa.int64(),
+    'County': CATEGORY_TYPE,
+    'State': CATEGORY_TYPE,
+    'Year': pa.int16(),
+}
+
+def read_column_names():
+    """Read the column header row (row 2) of the raw CSV."""
+    with open(RAW_DATA_PATH, newline='') as f:
+        reader = csv.reader(f)
+        next(reader)  # Category headers
+        return next(reader)
 
 def clean_igs_dataset():
     """Clean the IGS dataset and save to processed directory."""
@@ -26,59 +55,108 @@ def clean_igs_dataset():
     print("Mastercard IGS Dataset Cleaning Pipeline")
     print("=" * 60)
     
-    # Read the raw CSV, skipping first row (category headers) and row 3 (empty)
-    print("\n[1/5] Reading raw dataset...")
-    df = pd.read_csv(RAW_DATA_PATH, skiprows=[0, 2])
-    print(f"   ✓ Loaded {len(df)} rows and {len(df.columns)} columns")
+    # Stream the raw CSV through Arrow's parser block by block, skipping the
+    # first row (category headers). Column types are fixed up front so every
+    # block parses identically; 'N/A' and blank cells become nulls.
+    print("\n[1/5] Streaming raw dataset...")
+    columns = read_column_names()
+    numeric_columns = columns[6:]  # All columns from 'Inclusive Growth Score' onward
+    
+    # The first column is just a row index; leave it out of the parse entirely
+    output_columns = columns[1:] if columns[0] in ('', 'N/A') else columns
+    column_types = {
+        **IDENTIFIER_COLUMN_TYPES,
+        **{col: pa.float64() for col in numeric_columns},
+    }
+    # The raw file is memory-mapped so blocks are parsed straight out of the
+    # page cache instead of being copied into read buffers first
+    source = pa.memory_map(RAW_DATA_PATH, 'r')
+    reader = pacsv.open_csv(
+        source,
+        read_options=pacsv.ReadOptions(skip_rows=1, block_size=BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(
+            null_values=['N/A', ''],
+            strings_can_be_null=True,
+            column_types=column_types,
+            include_columns=output_columns
+        )
+    )
+    
+    # Running statistics, accumulated per block
+    row_count = 0
+    year_min = year_max = None
+    states, counties, tracts = set(), set(), set()
+    missing_counts = None
+    
+    os.makedirs(os.path.dirname(PROCESSED_DATA_PATH), exist_ok=True)
+    # Both copies are written straight from the typed Arrow batches, in the
+    # same format as the ETL pipeline's output
+    parquet_writer = pq.ParquetWriter(PROCESSED_PARQUET_PATH, reader.schema, compression='zstd')
+    with pacsv.CSVWriter(PROCESSED_DATA_PATH, reader.schema) as csv_writer:
+        for i, batch in enumerate(reader):
+            if i == 0:
+                # Drop row 3 (empty)
+                batch = batch.slice(1)
+            if batch.num_rows > 0:
+                parquet_writer.write_batch(batch, row_group_size=PARQUET_ROW_GROUP_SIZE)
+                csv_writer.write_batch(batch)
+            chunk = batch.to_pandas()
+            if chunk.empty:
+                continue
+            
+            years = chunk['Year'].dropna()
+            if len(years) > 0:
+                year_min = int(years.min()) if year_min is None else min(year_min, int(years.min()))
+                year_max = int(years.max()) if year_max is None else max(year_max, int(years.max()))
+            states.update(chunk['State'].dropna())
+            counties.update(chunk['County'].dropna())
+            tracts.update(chunk['Census Tract FIPS code'].dropna())
+            
+            chunk_missing = chunk.isna().sum()
+            missing_counts = chunk_missing if missing_counts is None else missing_counts + chunk_missing
+            
+            row_count += len(chunk)
+    parquet_writer.close()
+    source.close()
+    print(f"   ✓ Processed {row_count} rows and {len(columns)} columns")
     
     # Display basic info
     print(f"\n[2/5] Dataset Overview:")
-    print(f"   • Years covered: {df['Year'].min()} - {df['Year'].max()}")
-    print(f"   • Unique states: {df['State'].nunique()}")
-    print(f"   • Unique counties: {df['County'].nunique()}")
-    print(f"   • Unique census tracts: {df['Census Tract FIPS code'].nunique()}")
+    print(f"   • Years covered: {year_min} - {year_max}")
+    print(f"   • Unique states: {len(states)}")
+    print(f"   • Unique counties: {len(counties)}")
+    print(f"   • Unique census tracts: {len(tracts)}")
     
     # Handle missing values
     print(f"\n[3/5] Handling missing values...")
-    # Replace 'N/A' strings with actual NaN
-    df = df.replace('N/A', pd.NA)
-    
-    missing_counts = df.isna().sum()
     columns_with_missing = missing_counts[missing_counts > 0]
     print(f"   • Found {len(columns_with_missing)} columns with missing values")
     print(f"   • Most missing: {columns_with_missing.nlargest(5).to_dict()}")
     
-    # Convert numeric columns
+    # Numeric columns were typed while parsing
     print(f"\n[4/5] Converting data types...")
-    numeric_columns = df.columns[6:]  # All columns from 'Inclusive Growth Score' onward
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    print(f"   ✓ Converted {len(numeric_columns)} columns to numeric types")
-    
-    # Remove the first unnamed column if it exists (row index column)
-    if 'N/A' in df.columns or df.columns[0].startswith('Unnamed'):
-        df = df.iloc[:, 1:]
+    print(f"   ✓ Converted {len(numeric_columns)} columns to float64 and Year to int16")
+    if len(output_columns) < len(columns):
         print(f"   ✓ Removed index column")
     
     # Save cleaned dataset
     print(f"\n[5/5] Saving cleaned dataset...")
-    os.makedirs(os.path.dirname(PROCESSED_DATA_PATH), exist_ok=True)
-    df.to_csv(PROCESSED_DATA_PATH, index=False)
     print(f"   ✓ Saved to: {PROCESSED_DATA_PATH}")
+    print(f"   ✓ Saved to: {PROCESSED_PARQUET_PATH}")
     
     # Summary statistics
     print(f"\n" + "=" * 60)
     print(f"CLEANING COMPLETE")
     print(f"=" * 60)
-    print(f"Original rows: {len(df) + 3} (including metadata)")
-    print(f"Cleaned rows: {len(df)}")
-    print(f"Columns: {len(df.columns)}")
+    print(f"Original rows: {row_count + 3} (including metadata)")
+    print(f"Cleaned rows: {row_count}")
+    print(f"Columns: {len(output_columns)}")
     print(f"Output file size: {os.path.getsize(PROCESSED_DATA_PATH) / 1024:.2f} KB")
+    print(f"Parquet file size: {os.path.getsize(PROCESSED_PARQUET_PATH) / 1024:.2f} KB")
     print("=" * 60)
     
-    return df
+    return row_count
 
 if __name__ == "__main__":
-    cleaned_df = clean_igs_dataset()
+    row_count = clean_igs_dataset()
     print("\n✅ Dataset cleaning complete!")
-
@@ -5,15 +5,66 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 Handles backup and storage of IGS data to Google Cloud Storage
 """
 
+import asyncio
+import base64
+import gzip
 import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
+import google_crc32c
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
 from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
 import logging
 
+try:
+    from gcloud.aio.storage import Storage as AsyncStorage
+except ImportError:  # Optional; directory uploads fall back to the thread pool
+    AsyncStorage = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of concurrent transfers used for directory uploads/downloads
+MAX_WORKERS = 32
+
+# Files larger than this are sent as chunked resumable uploads
+RESUMABLE_THRESHOLD = 8 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Files larger than this are downloaded as concurrent byte-range slices
+SLICED_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+DOWNLOAD_WORKERS = 8
+
+# Concurrent requests allowed on the async client's event loop
+ASYNC_CONCURRENCY = 64
+
+# Bytes read at a time when checksumming local files
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+def local_crc32c(file_path: str) -> str:
+    """
+    Compute a file's CRC32C in the base64 form GCS reports for blobs
+    
+    Args:
+        file_path: Path to local file
+        
+    Returns:
+        Base64-encoded big-endian CRC32C digest
+    """
+    checksum = google_crc32c.Checksum()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(CHECKSUM_BLOCK_SIZE), b''):
+            checksum.update(block)
+    return base64.b64encode(checksum.digest()).decode('ascii')
+
 
 class GCSManager:
     """Manages interactions with Google Cloud Storage"""
@@ -27,6 +78,7 @@ class GCSManager:
             credentials_path: Path to service account JSON key file
         """
         self.bucket_name = bucket_name
+        self.credentials_path = credentials_path
         
         # Set up credentials
         if credentials_path:
@@ -38,6 +90,10 @@ class GCSManager:
             # Uses GOOGLE_APPLICATION_CREDENTIALS environment variable
             self.client = storage.Client()
         
+        # Size the HTTP connection pool so concurrent transfers don't block on it
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+        self.client._http.mount("https://", adapter)
+        
         self.bucket = self.client.bucket(bucket_name)
         logger.info(f"Connected to GCS bucket: {bucket_name}")
     
@@ -61,19 +117,27 @@ class GCSManager:
         if gcs_file_path is None:
             gcs_file_path = local_path.name
         
-        blob = self.bucket.blob(gcs_file_path)
-        blob.upload_from_filename(str(local_path))
+        # Large files (e.g. the database) go up in resumable chunks so a
+        # network error only retries the failed chunk
+        chunk_size = None
+        if local_path.stat().st_size > RESUMABLE_THRESHOLD:
+            chunk_size = UPLOAD_CHUNK_SIZE
+        
+        blob = self.bucket.blob(gcs_file_path, chunk_size=chunk_size)
+        blob.upload_from_filename(str(local_path), checksum="crc32c")
         
         logger.info(f"Uploaded {local_file_path} to gs://{self.bucket_name}/{gcs_file_path}")
         return f"gs://{self.bucket_name}/{gcs_file_path}"
     
-    def download_file(self, gcs_file_path: str, local_file_path: str) -> str:
+    def download_file(self, gcs_file_path: str, local_file_path: str, blob: storage.Blob = None) -> str:
         """
         Download a file from GCS
         
         Args:
             gcs_file_path: Path to file in GCS
             local_file_path: Destination path for downloaded file
+            blob: Blob for the file from an existing listing; its metadata
+                is fetched only when this is not given
             
         Returns:
             Local path of downloaded file
@@ -81,39 +145,260 @@ class GCSManager:
         local_path = Path(local_file_path)
         local_path.parent.mkdir(parents=True, exist_ok=True)
         
-        blob = self.bucket.blob(gcs_file_path)
-        blob.download_to_filename(str(local_path))
+        # A listed blob already carries its size and generation
+        if blob is None:
+            blob = self.bucket.get_blob(gcs_file_path)
+            if blob is None:
+                raise FileNotFoundError(f"gs://{self.bucket_name}/{gcs_file_path} does not exist")
+        
+        # Large files are fetched as parallel ranged GETs instead of one stream
+        if blob.size > SLICED_DOWNLOAD_THRESHOLD:
+            transfer_manager.download_chunks_concurrently(
+                blob,
+                str(local_path),
+                chunk_size=DOWNLOAD_CHUNK_SIZE,
+                worker_type=transfer_manager.THREAD,
+                max_workers=DOWNLOAD_WORKERS
+            )
+        else:
+            blob.download_to_filename(str(local_path))
         
         logger.info(f"Downloaded gs://{self.bucket_name}/{gcs_file_path} to {local_file_path}")
         return str(local_path)
     
-    def upload_directory(self, local_dir: str, gcs_prefix: str = "") -> list:
+    def upload_file_compressed(self, local_file_path: str, gcs_file_path: str) -> str:
+        """
+        Gzip a file and stream it to GCS without writing a local archive
+        
+        Args:
+            local_file_path: Path to local file
+            gcs_file_path: Destination path in GCS (conventionally ending in .gz)
+            
+        Returns:
+            GCS path of uploaded file
+        """
+        local_path = Path(local_file_path)
+        
+        if not local_path.exists():
+            raise FileNotFoundError(f"File not found: {local_file_path}")
+        
+        blob = self.bucket.blob(gcs_file_path)
+        with open(local_path, "rb") as source, \
+                blob.open("wb", chunk_size=UPLOAD_CHUNK_SIZE, content_type="application/gzip") as dest, \
+                gzip.GzipFile(fileobj=dest, mode="wb", compresslevel=6) as compressed:
+            shutil.copyfileobj(source, compressed, UPLOAD_CHUNK_SIZE)
+        
+        logger.info(f"Uploaded {local_file_path} (gzip) to gs://{self.bucket_name}/{gcs_file_path}")
+        return f"gs://{self.bucket_name}/{gcs_file_path}"
+    
+    def download_file_compressed(self, gcs_file_path: str, local_file_path: str, blob: storage.Blob = None) -> str:
+        """
+        Download a gzip file from GCS and decompress it
+        
+        Args:
+            gcs_file_path: Path to gzip file in GCS
+            local_file_path: Destination path for the decompressed file
+            blob: Blob for the file from an existing listing
+            
+        Returns:
+            Local path of decompressed file
+        """
+        local_path = Path(local_file_path)
+        archive_path = local_path.with_name(local_path.name + ".gz")
+        
+        self.download_file(gcs_file_path, str(archive_path), blob)
+        try:
+            with gzip.open(archive_path, "rb") as source, open(local_path, "wb") as dest:
+                shutil.copyfileobj(source, dest, UPLOAD_CHUNK_SIZE)
+        finally:
+            archive_path.unlink()
+        
+        logger.info(f"Decompressed {archive_path.name} to {local_file_path}")
+        return str(local_path)
+    
+    def _changed_files(self, local_dir: str, gcs_prefix: str) -> list:
+        """
+        Pair local files with their GCS paths, leaving out unchanged files
+        
+        The remote checksums come from a single listing of the prefix rather
+        than one metadata request per file.
+        
+        Args:
+            local_dir: Path to local directory
+            gcs_prefix: Prefix for GCS paths (like a folder)
+            
+        Returns:
+            List of (local file path, GCS path) tuples that need uploading
+        """
+        local_path = Path(local_dir)
+        remote_checksums = {
+            blob.name: blob.crc32c
+            for blob in self.client.list_blobs(self.bucket_name, prefix=gcs_prefix)
+        }
+        
+        changed_files = []
+        skipped = 0
+        for file_path in local_path.rglob('*'):
+            if not file_path.is_file():
+                continue
+            
+            # Create relative path for GCS
+            relative_path = file_path.relative_to(local_path).as_posix()
+            gcs_path = f"{gcs_prefix}/{relative_path}" if gcs_prefix else relative_path
+            
+            remote_checksum = remote_checksums.get(gcs_path)
+            if remote_checksum is not None and remote_checksum == local_crc32c(str(file_path)):
+                skipped += 1
+                continue
+            changed_files.append((file_path, gcs_path))
+        
+        if skipped:
+            logger.info(f"Skipped {skipped} unchanged files in {local_dir}")
+        return changed_files
+    
+    def upload_directory(self, local_dir: str, gcs_prefix: str = "", max_workers: int = MAX_WORKERS) -> list:
         """
         Upload all files in a directory to GCS
         
+        Files are uploaded concurrently since each upload is a blocking
+        network round-trip. Files whose CRC32C already matches the copy in
+        GCS are skipped.
+        
         Args:
             local_dir: Path to local directory
             gcs_prefix: Prefix for GCS paths (like a folder)
+            max_workers: Maximum number of concurrent uploads
             
         Returns:
             List of uploaded file paths
         """
-        local_path = Path(local_dir)
         uploaded_files = []
         
-        for file_path in local_path.rglob('*'):
-            if file_path.is_file():
-                # Create relative path for GCS
-                relative_path = file_path.relative_to(local_path)
-                gcs_path = f"{gcs_prefix}/{relative_path}" if gcs_prefix else str(relative_path)
-                
-                # Upload file
-                gcs_url = self.upload_file(str(file_path), gcs_path)
-                uploaded_files.append(gcs_url)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.upload_file, str(file_path), gcs_path)
+                for file_path, gcs_path in self._changed_files(local_dir, gcs_prefix)
+            ]
+            
+            for future in as_completed(futures):
+                uploaded_files.append(future.result())
         
         logger.info(f"Uploaded {len(uploaded_files)} files from {local_dir}")
         return uploaded_files
     
+    def upload_directory_async(
+        self,
+        local_dir: str,
+        gcs_prefix: str = "",
+        max_concurrency: int = ASYNC_CONCURRENCY
+    ) -> list:
+        """
+        Upload all files in a directory to GCS on a single event loop
+        
+        Many small files are dominated by request round-trips, which an
+        async client can overlap without a thread per upload. Falls back to
+        upload_directory when gcloud-aio-storage is not installed.
+        
+        Args:
+            local_dir: Path to local directory
+            gcs_prefix: Prefix for GCS paths (like a folder)
+            max_concurrency: Maximum number of uploads in flight
+            
+        Returns:
+            List of uploaded file paths
+        """
+        if AsyncStorage is None:
+            logger.info("gcloud-aio-storage not installed, using threaded upload")
+            return self.upload_directory(local_dir, gcs_prefix)
+        
+        uploaded_files = asyncio.run(
+            self._upload_directory_async(local_dir, gcs_prefix, max_concurrency)
+        )
+        
+        logger.info(f"Uploaded {len(uploaded_files)} files from {local_dir}")
+        return uploaded_files
+    
+    async def _upload_directory_async(
+        self,
+        local_dir: str,
+        gcs_prefix: str,
+        max_concurrency: int
+    ) -> list:
+        """Upload a directory with gcloud-aio-storage, capping requests in flight"""
+        files = self._changed_files(local_dir, gcs_prefix)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async with AsyncStorage(service_file=self.credentials_path) as async_storage:
+            async def upload(file_path: Path, gcs_path: str) -> str:
+                async with semaphore:
+                    await async_storage.upload_from_filename(self.bucket_name, gcs_path, str(file_path))
+                return f"gs://{self.bucket_name}/{gcs_path}"
+            
+            results = await asyncio.gather(
+                *[upload(file_path, gcs_path) for file_path, gcs_path in files],
+                return_exceptions=True
+            )
+        
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            raise errors[0]
+        return results
+    
+    def download_directory(
+        self,
+        gcs_prefix: str,
+        local_dir: str,
+        max_workers: int = MAX_WORKERS,
+        blobs: dict = None
+    ) -> list:
+        """
+        Download all files under a GCS prefix to a local directory
+        
+        Args:
+            gcs_prefix: Prefix of files in GCS (like a folder)
+            local_dir: Destination directory for downloaded files
+            max_workers: Maximum number of concurrent downloads
+            blobs: Existing listing from list_blobs to filter instead of
+                listing the prefix again
+            
+        Returns:
+            List of downloaded local file paths
+        """
+        prefix = gcs_prefix.rstrip("/") + "/"
+        local_path = Path(local_dir)
+        downloaded_files = []
+        
+        if blobs is None:
+            blobs = self.list_blobs(prefix)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.download_file, name, str(local_path / name[len(prefix):]), blob)
+                for name, blob in blobs.items()
+                if name.startswith(prefix) and not name.endswith("/")
+            ]
+            
+            for future in as_completed(futures):
+                downloaded_files.append(future.result())
+        
+        logger.info(f"Downloaded {len(downloaded_files)} files to {local_dir}")
+        return downloaded_files
+    
+    def list_blobs(self, prefix: str = "") -> dict:
+        """
+        List blobs in GCS bucket, keeping the metadata the listing returns
+        
+        Args:
+            prefix: Filter blobs by prefix
+            
+        Returns:
+            Dictionary of file name to Blob
+        """
+        blobs = {blob.name: blob for blob in self.client.list_blobs(self.bucket_name, prefix=prefix)}
+        
+        logger.info(f"Found {len(blobs)} files with prefix '{prefix}'")
+        return blobs
+    
     def list_files(self, prefix: str = "") -> list:
         """
         List files in GCS bucket
@@ -156,6 +441,24 @@ class GCSManager:
         return blob.exists()
 
 
+@lru_cache(maxsize=None)
+def get_gcs_manager(bucket_name: str, credentials_path: str = None) -> GCSManager:
+    """
+    Get a shared GCSManager for a bucket
+    
+    Reusing the manager keeps its authenticated client and pooled HTTPS
+    connections alive across backup and restore runs in the same process.
+    
+    Args:
+        bucket_name: GCS bucket name
+        credentials_path: Path to service account JSON key
+        
+    Returns:
+        Cached GCSManager for the bucket and credentials
+    """
+    return GCSManager(bucket_name, credentials_path)
+
+
 def backup_data_to_gcs(bucket_name: str, credentials_path: str = None):
     """
     Backup all IGS data files to Google Cloud Storage
@@ -165,20 +468,32 @@ def backup_data_to_gcs(bucket_name: str, credentials_path: str = None):
         credentials_path: Path to service account JSON key
     """
     try:
-        gcs = GCSManager(bucket_name, credentials_path)
+        gcs = get_gcs_manager(bucket_name, credentials_path)
         
         # Backup raw data
         logger.info("Backing up raw data...")
-        gcs.upload_directory("data/raw", "backup/raw")
+        gcs.upload_directory_async("data/raw", "backup/raw")
         
         # Backup processed data
         logger.info("Backing up processed data...")
-        gcs.upload_directory("data/processed", "backup/processed")
+        gcs.upload_directory_async("data/processed", "backup/processed")
         
         # Backup database
         logger.info("Backing up database...")
         if Path("data/igs_data.db").exists():
-            gcs.upload_file("data/igs_data.db", "backup/igs_data.db")
+            # Commits still sitting in the WAL file are not in igs_data.db
+            # itself, so upload a consistent snapshot taken with SQLite's
+            # backup API rather than the raw file
+            with tempfile.TemporaryDirectory() as snapshot_dir:
+                snapshot_path = str(Path(snapshot_dir) / "igs_data.db")
+                source = sqlite3.connect("data/igs_data.db")
+                snapshot = sqlite3.connect(snapshot_path)
+                try:
+                    source.backup(snapshot)
+                finally:
+                    snapshot.close()
+                    source.close()
+                gcs.upload_file_compressed(snapshot_path, "backup/igs_data.db.gz")
         
         logger.info("✓ Backup completed successfully!")
         return True
@@ -197,16 +512,33 @@ def restore_data_from_gcs(bucket_name: str, credentials_path: str = None):
         credentials_path: Path to service account JSON key
     """
     try:
-        gcs = GCSManager(bucket_name, credentials_path)
+        gcs = get_gcs_manager(bucket_name, credentials_path)
+        
+        # List available backups once; every check and download below uses
+        # this listing's names and metadata
+        blobs = gcs.list_blobs("backup/")
+        logger.info(f"Found {len(blobs)} backup files")
         
-        # List available backups
-        files = gcs.list_files("backup/")
-        logger.info(f"Found {len(files)} backup files")
+        # Restore raw and processed data
+        logger.info("Restoring raw data...")
+        gcs.download_directory("backup/raw", "data/raw", blobs=blobs)
         
-        # Download database
-        if gcs.file_exists("backup/igs_data.db"):
+        logger.info("Restoring processed data...")
+        gcs.download_directory("backup/processed", "data/processed", blobs=blobs)
+        
+        # A WAL or shared-memory file left from the old database would be
+        # replayed over the restored one, so remove them first
+        if "backup/igs_data.db.gz" in blobs or "backup/igs_data.db" in blobs:
+            for suffix in ("-wal", "-shm"):
+                Path(f"data/igs_data.db{suffix}").unlink(missing_ok=True)
+        
+        # Download database (older backups stored it uncompressed)
+        if "backup/igs_data.db.gz" in blobs:
+            logger.info("Restoring database...")
+            gcs.download_file_compressed("backup/igs_data.db.gz", "data/igs_data.db", blobs["backup/igs_data.db.gz"])
+        elif "backup/igs_data.db" in blobs:
             logger.info("Restoring database...")
-            gcs.download_file("backup/igs_data.db", "data/igs_data.db")
+            gcs.download_file("backup/igs_data.db", "data/igs_data.db", blobs["backup/igs_data.db"])
         
         logger.info("✓ Restore completed successfully!")
         return True
@@ -12,6 +12,14 @@ BASE_DIR = Path(__file__).parent.parent.parent
 DATABASE_PATH = BASE_DIR / "data" / "igs_data.db"
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
+# ETL data files
+RAW_DATA_PATH = BASE_DIR / "data" / "raw" / "IGS-score.csv"
+PROCESSED_DATA_PATH = BASE_DIR / "data" / "processed" / "IGS-score-cleaned.csv"
+
+# Analytics configuration (optional DuckDB engine over the cleaned Parquet file)
+PARQUET_PATH = BASE_DIR / "data" / "processed" / "IGS-score-cleaned.parquet"
+ANALYTICS_DATABASE = ":memory:"
+
 # API configuration
 API_TITLE = "IGS Data API"
 API_DESCRIPTION = """
@@ -40,6 +48,16 @@ CORS_ORIGINS = [
     "http://localhost:3000",  # React dev server (future)
     "http://127.0.0.1:8501",
 ]
+CORS_METHODS = ["GET", "OPTIONS"]  # The API is read-only
+CORS_HEADERS = ["Authorization", "Content-Type"]
+
+# Response caching for the read-only endpoints (seconds); every worker also
+# drops its cached responses as soon as the database files change, so these
+# only bound how long an unchanged database is served from memory
+CACHE_TTL = 3600
+TRACT_CACHE_TTL = 86400  # Per-tract trends and scorecards
+HEALTH_CACHE_TTL = 60  # Record and state summary behind /api/health
+CACHE_MAX_ENTRIES = 1024
 
 # Server configuration
 HOST = "0.0.0.0"
@@ -0,0 +1,165 @@
+"""
+Analytics Connection Manager
+CIS 301 Capstone Project - Clark Atlanta CIS301
+
+Optional DuckDB connection that runs aggregate queries straight against the
+cleaned Parquet file. Callers fall back to SQLite when DuckDB is not
+installed or the Parquet file has not been generated yet.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+try:
+    import duckdb
+except ImportError:  # Optional dependency
+    duckdb = None
+
+from ..config import ANALYTICS_DATABASE, PARQUET_PATH
+from .schema import CensusTract, COLUMN_MAPPING
+
+logger = logging.getLogger(__name__)
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def get_analytics_connection():
+    """
+    Get the shared DuckDB connection, creating the tracts view on first use
+    
+    The Parquet file keeps the raw CSV headers, so the view renames them to
+    the CensusTract column names through the shared column mapping.
+    
+    Returns:
+        DuckDB connection, or None if analytics are unavailable
+    """
+    global _connection
+    
+    if _connection is not None:
+        return _connection
+    if duckdb is None or not PARQUET_PATH.exists():
+        return None
+    
+    with _connection_lock:
+        if _connection is None:
+            conn = duckdb.connect(ANALYTICS_DATABASE)
+            parquet_path = str(PARQUET_PATH).replace("'", "''")
+            source_columns = [
+                row[0] for row in
+                conn.execute(f"DESCRIBE SELECT * FROM read_parquet('{parquet_path}')").fetchall()
+            ]
+            
+            # Map each Parquet header to its CensusTract column by name, so a
+            # reordered file still lines up and an unknown one is refused
+            unknown_columns = [source for source in source_columns if source not in COLUMN_MAPPING]
+            missing_columns = set(COLUMN_MAPPING).difference(source_columns)
+            if unknown_columns or missing_columns:
+                logger.error(
+                    "Parquet columns do not match the loader's column mapping "
+                    f"(unexpected: {unknown_columns}, missing: {sorted(missing_columns)}); analytics disabled"
+                )
+                conn.close()
+                return None
+            
+            select_list = ", ".join(
+                f'"{source}" AS {COLUMN_MAPPING[source]}'
+                for source in source_columns
+            )
+            conn.execute(f"CREATE VIEW tracts AS SELECT {select_list} FROM read_parquet('{parquet_path}')")
+            _connection = conn
+            logger.info(f"Analytics view created over {PARQUET_PATH}")
+    
+    return _connection
+
+
+def _where_clause(filters: dict) -> tuple:
+    """Build a parameterized WHERE clause from the non-empty filters"""
+    conditions = [f"{column} = ?" for column, value in filters.items() if value]
+    params = [value for value in filters.values() if value]
+    return (" AND " + " AND ".join(conditions) if conditions else ""), params
+
+
+def metric_statistics(
+    metric: str,
+    state: Optional[str] = None,
+    county: Optional[str] = None,
+    year: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Aggregate a metric with DuckDB
+    
+    Args:
+        metric: Metric column name
+        state: Optional state filter
+        county: Optional county filter
+        year: Optional year filter
+        
+    Returns:
+        Dictionary with count, mean, median, min, max and std_dev, or None
+        if analytics are unavailable for this metric
+    """
+    conn = get_analytics_connection()
+    if conn is None or metric not in CensusTract.COLUMNS:
+        return None
+    
+    where, params = _where_clause({"state": state, "county": county, "year": year})
+    row = conn.cursor().execute(
+        f"""
+        SELECT count({metric}), avg({metric}), median({metric}),
+               min({metric}), max({metric}), stddev_samp({metric})
+        FROM tracts
+        WHERE {metric} IS NOT NULL{where}
+        """,
+        params
+    ).fetchone()
+    
+    count, mean, median, min_value, max_value, std_dev = row
+    return {
+        "count": count,
+        "mean": mean,
+        "median": median,
+        "min": min_value,
+        "max": max_value,
+        "std_dev": std_dev if count > 1 else 0.0
+    }
+
+
+def metric_correlation(
+    metric_x: str,
+    metric_y: str,
+    state: Optional[str] = None,
+    year: Optional[int] = None
+) -> Optional[tuple]:
+    """
+    Pearson correlation between two metrics with DuckDB
+    
+    Args:
+        metric_x: First metric column name
+        metric_y: Second metric column name
+        state: Optional state filter
+        year: Optional year filter
+        
+    Returns:
+        Tuple of (correlation, sample size), or None if analytics are
+        unavailable for these metrics
+    """
+    conn = get_analytics_connection()
+    if conn is None or metric_x not in CensusTract.COLUMNS or metric_y not in CensusTract.COLUMNS:
+        return None
+    
+    where, params = _where_clause({"state": state, "year": year})
+    correlation, sample_size = conn.cursor().execute(
+        f"""
+        SELECT corr({metric_y}, {metric_x}), count(*)
+        FROM tracts
+        WHERE {metric_x} IS NOT NULL AND {metric_y} IS NOT NULL{where}
+        """,
+        params
+    ).fetchone()
+    
+    # Zero variance in either metric gives NULL/NaN
+    if correlation is None or correlation != correlation:
+        correlation = 0.0
+    return correlation, sample_size
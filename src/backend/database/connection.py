@@ -3,26 +3,45 @@ Database Connection Manager
 CIS 301 Capstone Project - Clark Atlanta CIS301
 """
 
-from sqlalchemy import create_engine
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
-import sys
-from pathlib import Path
+from typing import Generator, Optional, Union
 
-# Add backend directory to path
-backend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(backend_path))
-
-from config import DATABASE_URL
-from database.schema import Base
+from ..config import DATABASE_URL
+from .schema import Base, CensusTract
 
 # Create engine
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Needed for SQLite
+    connect_args={
+        "check_same_thread": False,  # Needed for SQLite
+        "timeout": 30  # Seconds to wait on a locked database
+    },
+    poolclass=QueuePool,
+    pool_size=16,
+    max_overflow=32,
+    # Compiled SQL is cached per query shape; metric-specific queries give
+    # each endpoint dozens of shapes, more than the default 500 entries hold
+    query_cache_size=1200,
     echo=False  # Set to True for SQL query logging
 )
 
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection for concurrent API reads"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Readers don't block on writers
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, fewer fsyncs
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    cursor.execute("PRAGMA mmap_size=268435456")  # Memory-map up to 256 MiB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -46,6 +65,58 @@ def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
 
+def bulk_load(
+    df: pd.DataFrame,
+    bind: Optional[Union[Engine, Connection]] = None,
+    chunksize: int = 10_000
+) -> int:
+    """
+    Bulk insert census tract rows, bypassing the ORM
+    
+    Rows go in as plain executemany batches inside a single transaction,
+    with fsyncs disabled until the load commits.
+    
+    Args:
+        df: DataFrame whose columns are CensusTract column names
+        bind: Engine to load into (defaults to the API engine), or a
+            Connection whose open transaction the rows join; the caller
+            then commits or rolls back
+        chunksize: Rows per executemany batch
+        
+    Returns:
+        Number of records inserted
+    """
+    target = bind if bind is not None else engine
+    
+    if isinstance(target, Connection):
+        df.to_sql(
+            CensusTract.__tablename__,
+            target,
+            if_exists="append",
+            index=False,
+            chunksize=chunksize
+        )
+        return len(df)
+    
+    with target.connect() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        try:
+            df.to_sql(
+                CensusTract.__tablename__,
+                conn,
+                if_exists="append",
+                index=False,
+                chunksize=chunksize
+            )
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+            conn.commit()
+    
+    return len(df)
+
+
 def close_db() -> None:
     """Close database connections"""
     engine.dispose()
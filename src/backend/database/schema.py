@@ -5,7 +5,9 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 Defines SQLAlchemy ORM models for the IGS database
 """
 
-from sqlalchemy import Column, Integer, Float, String, create_engine
+from operator import attrgetter
+
+from sqlalchemy import Column, Index, Integer, Float, String, create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -20,14 +22,28 @@ class CensusTract(Base):
     """
     __tablename__ = 'tracts'
     
+    # Composite indexes matching the API's filter combinations; they also
+    # cover lookups on their leading column alone
+    __table_args__ = (
+        Index('ix_tracts_state_year', 'state', 'year'),
+        Index('ix_tracts_county_state_year', 'county', 'state', 'year'),
+        Index('ix_tracts_fips_year', 'census_tract_fips', 'year'),
+        # Rankings by overall score within a year read this partial index in
+        # score order and count their matches without touching the table
+        Index(
+            'ix_tracts_year_igs', 'year', 'inclusive_growth_score',
+            sqlite_where=text('inclusive_growth_score IS NOT NULL')
+        ),
+    )
+    
     # Composite primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Core Identification Fields
     is_opportunity_zone = Column(String(10), nullable=True)
-    census_tract_fips = Column(String(20), nullable=False, index=True)
-    county = Column(String(100), nullable=False, index=True)
-    state = Column(String(50), nullable=False, index=True)
+    census_tract_fips = Column(String(20), nullable=False)
+    county = Column(String(100), nullable=False)
+    state = Column(String(50), nullable=False)
     year = Column(Integer, nullable=False, index=True)
     
     # Summary Scores
@@ -140,84 +156,152 @@ class CensusTract(Base):
     health_insurance_coverage_base_pct = Column(Float, nullable=True)
     health_insurance_coverage_tract_pct = Column(Float, nullable=True)
     
+    # Column names in table order, used to serialize instances
+    COLUMNS = (
+        'id', 'is_opportunity_zone', 'census_tract_fips', 'county', 'state', 'year',
+        'inclusive_growth_score', 'growth', 'inclusion', 'place', 'place_growth',
+        'place_inclusion', 'net_occupancy_score', 'net_occupancy_base_pct',
+        'net_occupancy_tract_pct', 'residential_real_estate_value_score',
+        'residential_real_estate_value_base_pct', 'residential_real_estate_value_tract_pct',
+        'acres_of_park_land_score', 'acres_of_park_land_base_pct',
+        'acres_of_park_land_tract_pct', 'affordable_housing_score',
+        'affordable_housing_base_pct', 'affordable_housing_tract_pct', 'internet_access_score',
+        'internet_access_base_pct', 'internet_access_tract_pct', 'travel_time_to_work_score',
+        'travel_time_to_work_base_pct', 'travel_time_to_work_tract_pct', 'economy',
+        'economy_growth', 'economy_inclusion', 'new_businesses_score',
+        'new_businesses_base_pct', 'new_businesses_tract_pct', 'spend_growth_score',
+        'spend_growth_base_pct', 'spend_growth_tract_pct', 'small_business_loans_score',
+        'small_business_loans_base_pct', 'small_business_loans_tract_pct',
+        'minority_women_owned_businesses_score', 'minority_women_owned_businesses_base_pct',
+        'minority_women_owned_businesses_tract_pct', 'labor_market_engagement_index_score',
+        'labor_market_engagement_index_base', 'labor_market_engagement_index_tract',
+        'commercial_diversity_score', 'commercial_diversity_base_pct',
+        'commercial_diversity_tract_pct', 'community', 'community_growth',
+        'community_inclusion', 'personal_income_score', 'personal_income_base_pct',
+        'personal_income_tract_pct', 'spending_per_capita_score',
+        'spending_per_capita_base_pct', 'spending_per_capita_tract_pct',
+        'female_above_poverty_score', 'female_above_poverty_base_pct',
+        'female_above_poverty_tract_pct', 'gini_coefficient_score', 'gini_coefficient_base',
+        'gini_coefficient_tract', 'early_education_enrollment_score',
+        'early_education_enrollment_base_pct', 'early_education_enrollment_tract_pct',
+        'health_insurance_coverage_score', 'health_insurance_coverage_base_pct',
+        'health_insurance_coverage_tract_pct',
+    )
+    
+    # Fetches every column value in one call, in COLUMNS order
+    _column_values = attrgetter(*COLUMNS)
+    
     def __repr__(self):
         return f"<CensusTract(fips={self.census_tract_fips}, year={self.year}, state={self.state})>"
     
     def to_dict(self):
         """Convert model instance to dictionary"""
-        return {
-            'id': self.id,
-            'is_opportunity_zone': self.is_opportunity_zone,
-            'census_tract_fips': self.census_tract_fips,
-            'county': self.county,
-            'state': self.state,
-            'year': self.year,
-            'inclusive_growth_score': self.inclusive_growth_score,
-            'growth': self.growth,
-            'inclusion': self.inclusion,
-            'place': self.place,
-            'place_growth': self.place_growth,
-            'place_inclusion': self.place_inclusion,
-            'net_occupancy_score': self.net_occupancy_score,
-            'net_occupancy_base_pct': self.net_occupancy_base_pct,
-            'net_occupancy_tract_pct': self.net_occupancy_tract_pct,
-            'residential_real_estate_value_score': self.residential_real_estate_value_score,
-            'residential_real_estate_value_base_pct': self.residential_real_estate_value_base_pct,
-            'residential_real_estate_value_tract_pct': self.residential_real_estate_value_tract_pct,
-            'acres_of_park_land_score': self.acres_of_park_land_score,
-            'acres_of_park_land_base_pct': self.acres_of_park_land_base_pct,
-            'acres_of_park_land_tract_pct': self.acres_of_park_land_tract_pct,
-            'affordable_housing_score': self.affordable_housing_score,
-            'affordable_housing_base_pct': self.affordable_housing_base_pct,
-            'affordable_housing_tract_pct': self.affordable_housing_tract_pct,
-            'internet_access_score': self.internet_access_score,
-            'internet_access_base_pct': self.internet_access_base_pct,
-            'internet_access_tract_pct': self.internet_access_tract_pct,
-            'travel_time_to_work_score': self.travel_time_to_work_score,
-            'travel_time_to_work_base_pct': self.travel_time_to_work_base_pct,
-            'travel_time_to_work_tract_pct': self.travel_time_to_work_tract_pct,
-            'economy': self.economy,
-            'economy_growth': self.economy_growth,
-            'economy_inclusion': self.economy_inclusion,
-            'new_businesses_score': self.new_businesses_score,
-            'new_businesses_base_pct': self.new_businesses_base_pct,
-            'new_businesses_tract_pct': self.new_businesses_tract_pct,
-            'spend_growth_score': self.spend_growth_score,
-            'spend_growth_base_pct': self.spend_growth_base_pct,
-            'spend_growth_tract_pct': self.spend_growth_tract_pct,
-            'small_business_loans_score': self.small_business_loans_score,
-            'small_business_loans_base_pct': self.small_business_loans_base_pct,
-            'small_business_loans_tract_pct': self.small_business_loans_tract_pct,
-            'minority_women_owned_businesses_score': self.minority_women_owned_businesses_score,
-            'minority_women_owned_businesses_base_pct': self.minority_women_owned_businesses_base_pct,
-            'minority_women_owned_businesses_tract_pct': self.minority_women_owned_businesses_tract_pct,
-            'labor_market_engagement_index_score': self.labor_market_engagement_index_score,
-            'labor_market_engagement_index_base': self.labor_market_engagement_index_base,
-            'labor_market_engagement_index_tract': self.labor_market_engagement_index_tract,
-            'commercial_diversity_score': self.commercial_diversity_score,
-            'commercial_diversity_base_pct': self.commercial_diversity_base_pct,
-            'commercial_diversity_tract_pct': self.commercial_diversity_tract_pct,
-            'community': self.community,
-            'community_growth': self.community_growth,
-            'community_inclusion': self.community_inclusion,
-            'personal_income_score': self.personal_income_score,
-            'personal_income_base_pct': self.personal_income_base_pct,
-            'personal_income_tract_pct': self.personal_income_tract_pct,
-            'spending_per_capita_score': self.spending_per_capita_score,
-            'spending_per_capita_base_pct': self.spending_per_capita_base_pct,
-            'spending_per_capita_tract_pct': self.spending_per_capita_tract_pct,
-            'female_above_poverty_score': self.female_above_poverty_score,
-            'female_above_poverty_base_pct': self.female_above_poverty_base_pct,
-            'female_above_poverty_tract_pct': self.female_above_poverty_tract_pct,
-            'gini_coefficient_score': self.gini_coefficient_score,
-            'gini_coefficient_base': self.gini_coefficient_base,
-            'gini_coefficient_tract': self.gini_coefficient_tract,
-            'early_education_enrollment_score': self.early_education_enrollment_score,
-            'early_education_enrollment_base_pct': self.early_education_enrollment_base_pct,
-            'early_education_enrollment_tract_pct': self.early_education_enrollment_tract_pct,
-            'health_insurance_coverage_score': self.health_insurance_coverage_score,
-            'health_insurance_coverage_base_pct': self.health_insurance_coverage_base_pct,
-            'health_insurance_coverage_tract_pct': self.health_insurance_coverage_tract_pct,
-        }
+        return dict(zip(self.COLUMNS, self._column_values(self)))
+
+
+# Column attribute for every numeric column, by name, resolved once so
+# routes look metrics up instead of calling getattr per request
+METRIC_COLUMNS = {
+    column.name: getattr(CensusTract, column.name)
+    for column in CensusTract.__table__.columns if isinstance(column.type, Float)
+}
+
+# Names the API accepts as a metric; checking membership keeps non-column
+# attributes such as query or metadata out of the lookups
+ALLOWED_METRICS = frozenset(METRIC_COLUMNS)
+
 
+# Column name mapping from the cleaned data files' headers to CensusTract
+# columns; shared by the ETL loader and the DuckDB analytics view
+COLUMN_MAPPING = {
+    'Is an Opportunity Zone': 'is_opportunity_zone',
+    'Census Tract FIPS code': 'census_tract_fips',
+    'County': 'county',
+    'State': 'state',
+    'Year': 'year',
+    'Inclusive Growth Score': 'inclusive_growth_score',
+    'Growth': 'growth',
+    'Inclusion': 'inclusion',
+    'Place': 'place',
+    'Place Growth': 'place_growth',
+    'Place Inclusion': 'place_inclusion',
+    'Net Occupancy Score': 'net_occupancy_score',
+    'Net Occupancy Base, %': 'net_occupancy_base_pct',
+    'Net Occupancy Tract, %': 'net_occupancy_tract_pct',
+    'Residential Real Estate Value Score': 'residential_real_estate_value_score',
+    'Residential Real Estate Value Base, %': 'residential_real_estate_value_base_pct',
+    'Residential Real Estate Value Tract, %': 'residential_real_estate_value_tract_pct',
+    'Acres of Park Land Score': 'acres_of_park_land_score',
+    'Acres of Park Land Base, %': 'acres_of_park_land_base_pct',
+    'Acres of Park Land Tract, %': 'acres_of_park_land_tract_pct',
+    'Affordable Housing Score': 'affordable_housing_score',
+    'Affordable Housing Base, %': 'affordable_housing_base_pct',
+    'Affordable Housing Tract, %': 'affordable_housing_tract_pct',
+    'Internet Access Score': 'internet_access_score',
+    'Internet Access Base, %': 'internet_access_base_pct',
+    'Internet Access Tract, %': 'internet_access_tract_pct',
+    'Travel Time to Work Score': 'travel_time_to_work_score',
+    'Travel Time to Work Base, %': 'travel_time_to_work_base_pct',
+    'Travel Time to Work Tract, %': 'travel_time_to_work_tract_pct',
+    'Economy': 'economy',
+    'Economy Growth': 'economy_growth',
+    'Economy Inclusion': 'economy_inclusion',
+    'New Businesses Score': 'new_businesses_score',
+    'New Businesses Base, %': 'new_businesses_base_pct',
+    'New Businesses Tract, %': 'new_businesses_tract_pct',
+    'Spend Growth Score': 'spend_growth_score',
+    'Spend Growth Base, %': 'spend_growth_base_pct',
+    'Spend Growth Tract, %': 'spend_growth_tract_pct',
+    'Small Business Loans Score': 'small_business_loans_score',
+    'Small Business Loans Base, %': 'small_business_loans_base_pct',
+    'Small Business Loans Tract, %': 'small_business_loans_tract_pct',
+    'Minority/Women Owned Businesses Score': 'minority_women_owned_businesses_score',
+    'Minority/Women Owned Businesses Base, %': 'minority_women_owned_businesses_base_pct',
+    'Minority/Women Owned Businesses Tract, %': 'minority_women_owned_businesses_tract_pct',
+    'Labor Market Engagement Index Score': 'labor_market_engagement_index_score',
+    'Labor Market Engagement Index Base': 'labor_market_engagement_index_base',
+    'Labor Market Engagement Index Tract': 'labor_market_engagement_index_tract',
+    'Commercial Diversity Score': 'commercial_diversity_score',
+    'Commercial Diversity Base, %': 'commercial_diversity_base_pct',
+    'Commercial Diversity Tract, %': 'commercial_diversity_tract_pct',
+    'Community': 'community',
+    'Community Growth': 'community_growth',
+    'Community Inclusion': 'community_inclusion',
+    'Personal Income Score': 'personal_income_score',
+    'Personal Income Base, %': 'personal_income_base_pct',
+    'Personal Income Tract, %': 'personal_income_tract_pct',
+    'Spending per Capita Score': 'spending_per_capita_score',
+    'Spending per Capita Base, %': 'spending_per_capita_base_pct',
+    'Spending per Capita Tract, %': 'spending_per_capita_tract_pct',
+    'Female Above Poverty Score': 'female_above_poverty_score',
+    'Female Above Poverty Base, %': 'female_above_poverty_base_pct',
+    'Female Above Poverty Tract, %': 'female_above_poverty_tract_pct',
+    'Gini Coefficient Score': 'gini_coefficient_score',
+    'Gini Coefficient Base': 'gini_coefficient_base',
+    'Gini Coefficient Tract': 'gini_coefficient_tract',
+    'Early Education Enrollment Score': 'early_education_enrollment_score',
+    'Early Education Enrollment Base, %': 'early_education_enrollment_base_pct',
+    'Early Education Enrollment Tract, %': 'early_education_enrollment_tract_pct',
+    'Health Insurance Coverage Score': 'health_insurance_coverage_score',
+    'Health Insurance Coverage Base, %': 'health_insurance_coverage_base_pct',
+    'Health Insurance Coverage Tract, %': 'health_insurance_coverage_tract_pct',
+}
 
+
+class TractPercentile(Base):
+    """
+    Precomputed state comparison for a tract's Inclusive Growth Score
+    
+    Rebuilt by the ETL loader after every load, with one row per tract that
+    has a score, so scorecards need no per-request scan of the state.
+    """
+    __tablename__ = 'tract_percentiles'
+    
+    # Same id as the CensusTract row
+    id = Column(Integer, primary_key=True)
+    
+    # Share of the state's tracts that year scoring strictly lower, 0-100
+    state_percentile = Column(Float, nullable=False)
+    
+    # Mean score of the state's tracts that year
+    state_avg = Column(Float, nullable=False)
@@ -4,16 +4,24 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 
 This module handles cleaning and preprocessing of the raw IGS CSV data:
 - Removes metadata rows (1-3)
-- Standardizes "N/A" values to proper nulls
+- Reads "N/A" values as proper nulls
 - Converts score columns to numeric types
-- Exports cleaned data for database loading
+- Exports cleaned data for database loading (CSV, plus Parquet for analytics)
 """
 
+import csv
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from pathlib import Path
+from typing import Callable, Optional
 import logging
 
+from ..config import RAW_DATA_PATH, PROCESSED_DATA_PATH
+from ..database.schema import COLUMN_MAPPING
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,20 +29,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Cell values read as missing
+NA_VALUES = ['N/A', 'n/a', 'NA']
+
+# Columns that should remain as strings
+STRING_COLUMNS = frozenset({
+    'Is an Opportunity Zone',
+    'Census Tract FIPS code',
+    'County',
+    'State'
+})
+
+
+def to_float_column(column: pd.Series) -> pd.Series:
+    """
+    Convert a column to Arrow-backed float64
+    
+    Non-convertible values become NaN. Whole-number columns parse as
+    integers, so they are cast to float as well.
+    
+    Args:
+        column: Column to convert
+        
+    Returns:
+        Converted column
+    """
+    return pd.to_numeric(column, errors='coerce').astype('double[pyarrow]')
+
+
+def year_range_and_duplicates(years: np.ndarray, fips: np.ndarray) -> tuple:
+    """
+    Find the year range and duplicate (year, FIPS) rows in a single scan
+    
+    Each (year, FIPS) pair is packed into one int64 key, so a single sort
+    puts duplicates next to each other.
+    
+    Args:
+        years: Year values as floats, NaN where missing
+        fips: Numeric FIPS codes as floats, NaN where missing
+        
+    Returns:
+        Tuple of (min year, max year, number of rows in duplicate groups);
+        the years are None when no year is present
+    """
+    has_year = ~np.isnan(years)
+    year_min = year_max = None
+    if has_year.any():
+        year_values = years[has_year]
+        year_min, year_max = int(year_values.min()), int(year_values.max())
+    
+    valid = has_year & ~np.isnan(fips)
+    keys = np.sort(years[valid].astype(np.int64) * 10**12 + fips[valid].astype(np.int64))
+    
+    # A row is a duplicate if its key matches either neighbour
+    same_as_next = keys[1:] == keys[:-1]
+    in_group = np.zeros(len(keys), dtype=bool)
+    in_group[1:] |= same_as_next
+    in_group[:-1] |= same_as_next
+    
+    return year_min, year_max, int(in_group.sum())
+
 
 class IGSDataCleaner:
     """Handles cleaning and preprocessing of IGS dataset"""
     
-    def __init__(self, raw_data_path: str, processed_data_path: str):
+    def __init__(self, raw_data_path: str, processed_data_path: str, write_csv: bool = True):
         """
         Initialize the data cleaner
         
         Args:
             raw_data_path: Path to raw CSV file
             processed_data_path: Path to save cleaned CSV file
+            write_csv: Whether to write the cleaned CSV; the Parquet copy is
+                always written
         """
         self.raw_data_path = Path(raw_data_path)
         self.processed_data_path = Path(processed_data_path)
+        self.write_csv = write_csv
         self.df = None
         
     def load_raw_data(self) -> pd.DataFrame:
@@ -46,43 +117,50 @@ class IGSDataCleaner:
         """
         logger.info(f"Loading raw data from {self.raw_data_path}")
         
-        # Skip first row (category headers), use second row as column names, skip third row (empty)
+        # Row 0 holds category headers, so row 1 is the header. It is checked
+        # against the expected columns, and only those are parsed; anything
+        # else (such as the leading index/N/A column) is left out entirely.
+        with open(self.raw_data_path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader)  # Category headers
+            columns = next(reader)
+        
+        missing_columns = [col for col in COLUMN_MAPPING if col not in columns]
+        if missing_columns:
+            raise ValueError(f"Raw data is missing expected columns: {missing_columns}")
+        
+        usecols = [col for col in columns if col in COLUMN_MAPPING]
+        if len(usecols) < len(columns):
+            skipped = [col for col in columns if col not in COLUMN_MAPPING]
+            logger.info(f"Skipping unexpected columns: {skipped}")
+        
+        # Arrow parses the file in parallel straight into Arrow-backed
+        # columns, with 'N/A' (and its variants) read as null
         self.df = pd.read_csv(
             self.raw_data_path,
-            skiprows=[0, 2],  # Skip row 0 (categories) and row 2 (empty)
-            header=0  # Use row 1 as header (becomes row 0 after skipping)
+            header=1,
+            usecols=usecols,
+            engine='pyarrow',
+            dtype_backend='pyarrow',
+            na_values=NA_VALUES
         )
         
-        # Remove the first column which is just an index or N/A column
-        if self.df.columns[0] in ['Unnamed: 0', '0', 'N/A'] or str(self.df.columns[0]).isdigit():
-            self.df = self.df.drop(self.df.columns[0], axis=1)
-            logger.info("Removed index/N/A column")
-        
-        logger.info(f"Loaded {len(self.df)} records with {len(self.df.columns)} columns")
-        return self.df
-    
-    def handle_missing_values(self) -> pd.DataFrame:
-        """
-        Standardize missing values - convert 'N/A' strings to NaN
-        
-        Returns:
-            DataFrame with standardized missing values
-        """
-        logger.info("Standardizing missing values")
+        # Drop row 2 (empty spacer row)
+        self.df = self.df.dropna(how='all').reset_index(drop=True)
         
-        # Replace 'N/A' strings with numpy NaN
-        self.df = self.df.replace('N/A', np.nan)
+        # Count columns with missing values; per-column counts are only
+        # computed when debug logging will show them
+        columns_with_missing = int(self.df.isna().any().sum())
         
-        # Count missing values per column
-        missing_counts = self.df.isnull().sum()
-        columns_with_missing = missing_counts[missing_counts > 0]
-        
-        if len(columns_with_missing) > 0:
-            logger.info(f"Found missing values in {len(columns_with_missing)} columns")
-            logger.debug(f"Columns with missing values:\n{columns_with_missing}")
+        if columns_with_missing > 0:
+            logger.info(f"Found missing values in {columns_with_missing} columns")
+            if logger.isEnabledFor(logging.DEBUG):
+                missing_counts = self.df.isna().sum()
+                logger.debug(f"Columns with missing values:\n{missing_counts[missing_counts > 0]}")
         else:
             logger.info("No missing values found")
         
+        logger.info(f"Loaded {len(self.df)} records with {len(self.df.columns)} columns")
         return self.df
     
     def convert_data_types(self) -> pd.DataFrame:
@@ -94,23 +172,23 @@ class IGSDataCleaner:
         """
         logger.info("Converting data types")
         
-        # Define columns that should remain as strings
-        string_columns = [
-            'Is an Opportunity Zone',
-            'Census Tract FIPS code',
-            'County',
-            'State'
-        ]
-        
-        # Year should be integer
+        # Year should be integer; 2017-2024 fits comfortably in 16 bits
         if 'Year' in self.df.columns:
-            self.df['Year'] = pd.to_numeric(self.df['Year'], errors='coerce').astype('Int64')
-        
-        # Convert all score and percentage columns to numeric (float)
-        for col in self.df.columns:
-            if col not in string_columns and col != 'Year':
-                # Try to convert to numeric, keeping NaN for non-convertible values
-                self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
+            self.df['Year'] = pd.to_numeric(self.df['Year'], errors='coerce').astype('Int16')
+        
+        # Convert all score and percentage columns to numeric (float). The
+        # columns are independent and Arrow's kernels release the GIL, so
+        # they are converted on a thread pool and assigned back as one block.
+        numeric_columns = [col for col in self.df.columns if col not in STRING_COLUMNS and col != 'Year']
+        if numeric_columns:
+            with ThreadPoolExecutor() as executor:
+                converted = executor.map(to_float_column, (self.df[col] for col in numeric_columns))
+                self.df[numeric_columns] = pd.concat(list(converted), axis=1)
+        
+        # Low-cardinality text is stored dictionary-encoded
+        for col in ['State', 'County', 'Is an Opportunity Zone']:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
         
         logger.info("Data type conversion complete")
         return self.df
@@ -135,23 +213,26 @@ class IGSDataCleaner:
             'Inclusive Growth Score'
         ]
         
-        for col in required_columns:
-            if col not in self.df.columns:
+        missing_columns = set(required_columns).difference(self.df.columns)
+        if missing_columns:
+            for col in sorted(missing_columns):
                 logger.error(f"Required column missing: {col}")
-                validation_passed = False
+            validation_passed = False
         
-        # Check Year range
+        # Check Year range and duplicate records (same FIPS code and year)
+        # in one pass over the two key columns
         if 'Year' in self.df.columns:
-            years = self.df['Year'].dropna()
-            if len(years) > 0:
-                year_min, year_max = years.min(), years.max()
-                if year_min < 2017 or year_max > 2024:
-                    logger.warning(f"Year range {year_min}-{year_max} outside expected 2017-2024")
-        
-        # Check for duplicate records (same FIPS code and year)
-        if 'Census Tract FIPS code' in self.df.columns and 'Year' in self.df.columns:
-            duplicates = self.df.duplicated(subset=['Census Tract FIPS code', 'Year'], keep=False)
-            duplicate_count = duplicates.sum()
+            years = pd.to_numeric(self.df['Year'], errors='coerce').to_numpy('float64', na_value=np.nan)
+            if 'Census Tract FIPS code' in self.df.columns:
+                fips = pd.to_numeric(
+                    self.df['Census Tract FIPS code'], errors='coerce'
+                ).to_numpy('float64', na_value=np.nan)
+            else:
+                fips = np.full(len(years), np.nan)
+            
+            year_min, year_max, duplicate_count = year_range_and_duplicates(years, fips)
+            if year_min is not None and (year_min < 2017 or year_max > 2024):
+                logger.warning(f"Year range {year_min}-{year_max} outside expected 2017-2024")
             if duplicate_count > 0:
                 logger.warning(f"Found {duplicate_count} duplicate records")
         
@@ -174,15 +255,25 @@ class IGSDataCleaner:
         # Ensure processed directory exists
         self.processed_data_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Save to CSV with empty string for NA values to avoid multiple consecutive commas
-        self.df.to_csv(self.processed_data_path, index=False, na_rep='')
+        # Arrow's C++ writer formats whole columns at once; NA values are
+        # written as empty fields
+        if self.write_csv:
+            table = pa.Table.from_pandas(self.df, preserve_index=False)
+            pacsv.write_csv(table, str(self.processed_data_path))
+        
+        # Typed Parquet copy for the database loader and DuckDB analytics view
+        self.df.to_parquet(self.processed_data_path.with_suffix('.parquet'), index=False, compression='zstd')
         
-        logger.info(f"Successfully saved {len(self.df)} records to {self.processed_data_path}")
+        logger.info(f"Successfully saved {len(self.df)} records to {self.processed_data_path.parent}")
     
-    def clean(self) -> pd.DataFrame:
+    def clean(self, on_validated: Optional[Callable[[pd.DataFrame], None]] = None) -> pd.DataFrame:
         """
         Execute complete cleaning pipeline
         
+        Args:
+            on_validated: Called with the cleaned DataFrame once it passes
+                validation, before the output files are written
+        
         Returns:
             Cleaned DataFrame
         """
@@ -191,18 +282,18 @@ class IGSDataCleaner:
         # Step 1: Load raw data
         self.load_raw_data()
         
-        # Step 2: Handle missing values
-        self.handle_missing_values()
-        
-        # Step 3: Convert data types
+        # Step 2: Convert data types ('N/A' values were read as nulls)
         self.convert_data_types()
         
-        # Step 4: Validate data
+        # Step 3: Validate data
         if not self.validate_data():
             logger.error("Data validation failed - check logs for details")
             raise ValueError("Data validation failed")
         
-        # Step 5: Save cleaned data
+        if on_validated is not None:
+            on_validated(self.df)
+        
+        # Step 4: Save cleaned data
         self.save_cleaned_data()
         
         logger.info("Data cleaning pipeline complete")
@@ -212,8 +303,8 @@ class IGSDataCleaner:
 def main():
     """Main execution function"""
     # Define paths
-    raw_data_path = "data/raw/IGS-score.csv"
-    processed_data_path = "data/processed/IGS-score-cleaned.csv"
+    raw_data_path = str(RAW_DATA_PATH)
+    processed_data_path = str(PROCESSED_DATA_PATH)
     
     # Create cleaner instance
     cleaner = IGSDataCleaner(raw_data_path, processed_data_path)
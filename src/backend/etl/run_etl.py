@@ -8,20 +8,19 @@ Orchestrates the complete ETL process:
 3. Validate data integrity
 """
 
-import sys
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
 from pathlib import Path
 import logging
 from datetime import datetime
 
-# Add backend directory to path
-backend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(backend_path))
-
-from etl.data_cleaning import IGSDataCleaner
-from etl.load_database import IGSDatabaseLoader
-from database.schema import Base, CensusTract
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from .data_cleaning import IGSDataCleaner
+from .load_database import IGSDatabaseLoader
+from ..config import RAW_DATA_PATH, PROCESSED_DATA_PATH, DATABASE_PATH
+from ..database.schema import CensusTract
 
 # Configure logging
 logging.basicConfig(
@@ -30,15 +29,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Rows per chunk handed from the cleaner to the loader
+PIPELINE_CHUNK_SIZE = 10_000
+
+# Chunks allowed to wait between the cleaner and the loader
+PIPELINE_QUEUE_SIZE = 4
+
+# Queued in place of the end-of-stream None when cleaning fails, so the
+# loader rolls back instead of committing the chunks it already has
+CLEANING_FAILED = object()
+
+# Record count, year range and states in a single aggregate query
+VALIDATION_QUERY = (
+    "SELECT COUNT(id), MIN(year), MAX(year), GROUP_CONCAT(DISTINCT state) "
+    f"FROM {CensusTract.__tablename__}"
+)
+
 
 class ETLPipeline:
     """Orchestrates the complete ETL pipeline"""
     
     def __init__(
         self,
-        raw_data_path: str = "data/raw/IGS-score.csv",
-        processed_data_path: str = "data/processed/IGS-score-cleaned.csv",
-        database_path: str = "data/igs_data.db"
+        raw_data_path: str = str(RAW_DATA_PATH),
+        processed_data_path: str = str(PROCESSED_DATA_PATH),
+        database_path: str = str(DATABASE_PATH),
+        write_csv: bool = True
     ):
         """
         Initialize the ETL pipeline
@@ -47,10 +63,13 @@ class ETLPipeline:
             raw_data_path: Path to raw CSV file
             processed_data_path: Path to save cleaned CSV file
             database_path: Path to SQLite database file
+            write_csv: Whether to also write the cleaned CSV; the loader never
+                reads it back
         """
         self.raw_data_path = raw_data_path
         self.processed_data_path = processed_data_path
         self.database_path = database_path
+        self.write_csv = write_csv
         
         self.cleaner = None
         self.loader = None
@@ -62,10 +81,15 @@ class ETLPipeline:
             'status': 'pending'
         }
     
-    def run_cleaning(self) -> bool:
+    def run_cleaning(self, chunks: queue.Queue = None) -> bool:
         """
         Run data cleaning step
         
+        Args:
+            chunks: Queue to stream validated chunks into for the loader,
+                followed by None once cleaning succeeds or CLEANING_FAILED
+                if it fails
+        
         Returns:
             True if successful, False otherwise
         """
@@ -73,21 +97,36 @@ class ETLPipeline:
         logger.info("STEP 1: DATA CLEANING")
         logger.info("=" * 60)
         
+        succeeded = False
         try:
-            self.cleaner = IGSDataCleaner(self.raw_data_path, self.processed_data_path)
-            cleaned_df = self.cleaner.clean()
+            self.cleaner = IGSDataCleaner(self.raw_data_path, self.processed_data_path, self.write_csv)
+            
+            def enqueue_chunks(df):
+                # The loader starts inserting while the cleaned files are written
+                for start in range(0, len(df), PIPELINE_CHUNK_SIZE):
+                    chunks.put(df.iloc[start:start + PIPELINE_CHUNK_SIZE])
+            
+            cleaned_df = self.cleaner.clean(on_validated=enqueue_chunks if chunks is not None else None)
             self.stats['records_cleaned'] = len(cleaned_df)
-            logger.info(f"Data cleaning successful - {self.stats['records_cleaned']} records")
+            logger.info("Data cleaning successful - %d records", self.stats['records_cleaned'])
+            succeeded = True
             return True
         except Exception as e:
-            logger.error(f"Data cleaning failed: {str(e)}")
+            logger.error("Data cleaning failed: %s", e)
             self.stats['status'] = 'failed_cleaning'
             return False
+        finally:
+            if chunks is not None:
+                chunks.put(None if succeeded else CLEANING_FAILED)
     
-    def run_loading(self) -> bool:
+    def run_loading(self, chunks: queue.Queue = None) -> bool:
         """
         Run database loading step
         
+        Args:
+            chunks: Queue of cleaned chunks from run_cleaning to insert
+                instead of reading the cleaned Parquet file
+        
         Returns:
             True if successful, False otherwise
         """
@@ -95,15 +134,36 @@ class ETLPipeline:
         logger.info("STEP 2: DATABASE LOADING")
         logger.info("=" * 60)
         
+        finished = threading.Event()
+        
+        def queued_chunks():
+            while (chunk := chunks.get()) is not None:
+                if chunk is CLEANING_FAILED:
+                    finished.set()
+                    raise RuntimeError("cleaning failed, discarding the streamed chunks")
+                yield chunk
+            finished.set()
+        
         try:
-            self.loader = IGSDatabaseLoader(self.processed_data_path, self.database_path)
-            records_count = self.loader.load()
+            # Load from the typed Parquet copy written alongside the CSV
+            parquet_path = str(Path(self.processed_data_path).with_suffix('.parquet'))
+            self.loader = IGSDatabaseLoader(parquet_path, self.database_path, batch_size=PIPELINE_CHUNK_SIZE)
+            records_count = self.loader.load(queued_chunks() if chunks is not None else None)
+            
+            # Release the loader's pooled connections before validation
+            self.loader.engine.dispose()
             self.stats['records_loaded'] = records_count
-            logger.info(f"Database loading successful - {self.stats['records_loaded']} records")
+            logger.info("Database loading successful - %d records", self.stats['records_loaded'])
             return True
         except Exception as e:
-            logger.error(f"Database loading failed: {str(e)}")
-            self.stats['status'] = 'failed_loading'
+            logger.error("Database loading failed: %s", e)
+            if self.stats['status'] != 'failed_cleaning':
+                self.stats['status'] = 'failed_loading'
+            
+            # Keep draining so the cleaner never blocks on a full queue
+            if chunks is not None and not finished.is_set():
+                while (chunk := chunks.get()) is not None and chunk is not CLEANING_FAILED:
+                    pass
             return False
     
     def validate_pipeline(self) -> bool:
@@ -118,38 +178,28 @@ class ETLPipeline:
         logger.info("=" * 60)
         
         try:
-            # Connect to database
-            engine = create_engine(f'sqlite:///{self.database_path}')
-            Session = sessionmaker(bind=engine)
-            session = Session()
-            
-            # Check record count
-            db_count = session.query(CensusTract).count()
-            logger.info(f"Database contains {db_count} records")
+            # A read-only aggregate needs no ORM session
+            with closing(sqlite3.connect(self.database_path)) as conn:
+                db_count, min_year, max_year, states = conn.execute(VALIDATION_QUERY).fetchone()
             
-            # Check for required states
-            states = session.query(CensusTract.state).distinct().all()
-            state_list = [s[0] for s in states]
-            logger.info(f"States in database: {', '.join(state_list)}")
+            logger.info("Database contains %d records", db_count)
             
-            # Check year range
-            min_year = session.query(CensusTract.year).filter(CensusTract.year.isnot(None)).order_by(CensusTract.year).first()
-            max_year = session.query(CensusTract.year).filter(CensusTract.year.isnot(None)).order_by(CensusTract.year.desc()).first()
+            # GROUP_CONCAT already joins the states with commas
+            logger.info("States in database: %s", states.replace(',', ', ') if states else '')
             
-            if min_year and max_year:
-                logger.info(f"Year range: {min_year[0]} - {max_year[0]}")
+            if min_year is not None and max_year is not None:
+                logger.info("Year range: %s - %s", min_year, max_year)
             
             # Verify data matches
             if db_count != self.stats['records_cleaned']:
-                logger.warning(f"Record count mismatch: cleaned={self.stats['records_cleaned']}, loaded={db_count}")
+                logger.warning("Record count mismatch: cleaned=%d, loaded=%d", self.stats['records_cleaned'], db_count)
             else:
                 logger.info("Record counts match - validation successful")
             
-            session.close()
             return True
             
         except Exception as e:
-            logger.error(f"Validation failed: {str(e)}")
+            logger.error("Validation failed: %s", e)
             self.stats['status'] = 'failed_validation'
             return False
     
@@ -161,21 +211,34 @@ class ETLPipeline:
             True if successful, False otherwise
         """
         self.stats['start_time'] = datetime.now()
+        started = time.perf_counter()  # Monotonic, unaffected by clock changes
         
         logger.info("\n" + "=" * 60)
         logger.info("STARTING ETL PIPELINE")
         logger.info("=" * 60)
-        logger.info(f"Raw Data: {self.raw_data_path}")
-        logger.info(f"Processed Data: {self.processed_data_path}")
-        logger.info(f"Database: {self.database_path}")
+        logger.info("Raw Data: %s", self.raw_data_path)
+        logger.info("Processed Data: %s", self.processed_data_path)
+        logger.info("Database: %s", self.database_path)
         logger.info("")
         
-        # Step 1: Clean data
-        if not self.run_cleaning():
-            return False
+        # Steps 1 and 2: Clean data and load it into the database concurrently;
+        # the cleaner streams validated chunks to the loader through a bounded
+        # queue so inserts overlap with writing the cleaned files
+        chunks = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        results = {}
+        
+        cleaning = threading.Thread(
+            target=lambda: results.update(cleaning=self.run_cleaning(chunks))
+        )
+        loading = threading.Thread(
+            target=lambda: results.update(loading=self.run_loading(chunks))
+        )
+        cleaning.start()
+        loading.start()
+        cleaning.join()
+        loading.join()
         
-        # Step 2: Load into database
-        if not self.run_loading():
+        if not results.get('cleaning') or not results.get('loading'):
             return False
         
         # Step 3: Validate
@@ -184,17 +247,17 @@ class ETLPipeline:
         
         # Calculate duration
         self.stats['end_time'] = datetime.now()
-        duration = (self.stats['end_time'] - self.stats['start_time']).total_seconds()
+        duration = time.perf_counter() - started
         self.stats['status'] = 'success'
         
         # Print summary
         logger.info("\n" + "=" * 60)
         logger.info("ETL PIPELINE COMPLETE")
         logger.info("=" * 60)
-        logger.info(f"Status: {self.stats['status']}")
-        logger.info(f"Records Cleaned: {self.stats['records_cleaned']}")
-        logger.info(f"Records Loaded: {self.stats['records_loaded']}")
-        logger.info(f"Duration: {duration:.2f} seconds")
+        logger.info("Status: %s", self.stats['status'])
+        logger.info("Records Cleaned: %d", self.stats['records_cleaned'])
+        logger.info("Records Loaded: %d", self.stats['records_loaded'])
+        logger.info("Duration: %.2f seconds", duration)
         logger.info("=" * 60)
         
         return True
@@ -220,14 +283,14 @@ def main():
         if success:
             print("\n[SUCCESS] ETL Pipeline completed successfully!")
             print(f"  - Records processed: {pipeline.stats['records_cleaned']}")
-            print(f"  - Database: data/igs_data.db")
+            print(f"  - Database: {pipeline.database_path}")
             return 0
         else:
             print(f"\n[ERROR] ETL Pipeline failed at: {pipeline.stats['status']}")
             return 1
             
     except Exception as e:
-        logger.error(f"ETL Pipeline error: {str(e)}")
+        logger.error("ETL Pipeline error: %s", e)
         print(f"\n[ERROR] ETL Pipeline failed: {str(e)}")
         return 1
 
@@ -5,19 +5,29 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 Main entry point for the IGS Data API
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import sys
-from pathlib import Path
 
-# Add backend directory to path
-backend_path = Path(__file__).parent
-sys.path.insert(0, str(backend_path))
+from .config import API_TITLE, API_DESCRIPTION, API_VERSION, CORS_ORIGINS, CORS_METHODS, CORS_HEADERS
+from .routes.tracts import router as tracts_router
+from .routes.insights import router as insights_router
+from .database.connection import init_db, close_db
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the database on startup and release its connections on shutdown"""
+    init_db()
+    print("[INFO] Database initialized")
+    print(f"[INFO] API running at http://localhost:8000")
+    print(f"[INFO] API documentation at http://localhost:8000/docs")
+    yield
+    close_db()
+    print("[INFO] Shutting down API")
 
-from config import API_TITLE, API_DESCRIPTION, API_VERSION, CORS_ORIGINS
-from routes.tracts import router as tracts_router
-from routes.insights import router as insights_router
-from database.connection import init_db
 
 # Create FastAPI application
 app = FastAPI(
@@ -25,7 +35,9 @@ app = FastAPI(
     description=API_DESCRIPTION,
     version=API_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,  # Floats and dicts encoded in C
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -33,8 +45,8 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=CORS_METHODS,
+    allow_headers=CORS_HEADERS,
 )
 
 # Include routers
@@ -42,21 +54,6 @@ app.include_router(tracts_router)
 app.include_router(insights_router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-    print("[INFO] Database initialized")
-    print(f"[INFO] API running at http://localhost:8000")
-    print(f"[INFO] API documentation at http://localhost:8000/docs")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Clean up on shutdown"""
-    print("[INFO] Shutting down API")
-
-
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -69,14 +66,21 @@ async def root():
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    from config import HOST, PORT, RELOAD
+    from .config import HOST, PORT, RELOAD
     
-    uvicorn.run(
-        "main:app",
-        host=HOST,
-        port=PORT,
-        reload=RELOAD
-    )
+    if RELOAD:
+        uvicorn.run("backend.main:app", host=HOST, port=PORT, reload=True)
+    else:
+        # One worker process per core; uvloop has no Windows build
+        uvicorn.run(
+            "backend.main:app",
+            host=HOST,
+            port=PORT,
+            workers=os.cpu_count(),
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools"
+        )
 
 
@@ -3,12 +3,14 @@ Pydantic Response Models for FastAPI
 CIS 301 Capstone Project - Clark Atlanta CIS301
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List
 
 
 class TractResponse(BaseModel):
     """Response model for a single census tract"""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     is_opportunity_zone: Optional[str] = None
     census_tract_fips: str
@@ -42,9 +44,6 @@ class TractResponse(BaseModel):
     personal_income_tract_pct: Optional[float] = None
     
     small_business_loans_score: Optional[float] = None
-    
-    class Config:
-        from_attributes = True
 
 
 class TractListResponse(BaseModel):
@@ -53,6 +52,10 @@ class TractListResponse(BaseModel):
     tracts: List[TractResponse] = Field(..., description="List of census tracts")
 
 
+# Validates and serializes a whole list of tracts in one pydantic-core call
+TractListAdapter = TypeAdapter(List[TractResponse])
+
+
 class StateResponse(BaseModel):
     """Response model for state information"""
     state: str
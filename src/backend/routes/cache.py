@@ -0,0 +1,100 @@
+"""
+Response Cache for API Routes
+CIS 301 Capstone Project - Clark Atlanta CIS301
+
+In-process cache for read-only analytics endpoints. Tract scores only
+change when the ETL pipeline reloads the database, so computed responses
+are kept for a fixed time instead of being recomputed on every request.
+
+Every worker process keeps its own cache, so invalidation cannot rely on
+a request reaching the right worker. Instead each lookup compares the
+database files' modification times with those seen when the cache was
+filled, and any write to the database empties the cache in every worker.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable
+
+from ..config import CACHE_MAX_ENTRIES, DATABASE_PATH
+
+# Files whose modification times change whenever the database is written;
+# in WAL mode commits land in the -wal file until they are checkpointed
+DATABASE_FILES = (str(DATABASE_PATH), f"{DATABASE_PATH}-wal")
+
+_entries = OrderedDict()
+_generation = None
+_lock = threading.Lock()
+
+
+def database_generation() -> tuple:
+    """
+    Identify the current state of the database files
+    
+    Returns:
+        Tuple of modification times in nanoseconds, 0 for a missing file
+    """
+    generation = []
+    for path in DATABASE_FILES:
+        try:
+            generation.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            generation.append(0)
+    return tuple(generation)
+
+
+def cached_response(expire: int) -> Callable:
+    """
+    Cache a route's return value per combination of query parameters
+    
+    The key is the route's module and qualified name plus its sorted
+    arguments, so parameter order in the URL does not matter and same-named
+    handlers in different modules do not collide. The database session is
+    not part of the key. Errors raised by the route are never cached, and
+    the whole cache is emptied once the database has been written.
+    
+    Args:
+        expire: Seconds a cached response stays valid
+    
+    Returns:
+        Decorator for a route function
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            global _generation
+            
+            params = tuple(sorted((name, value) for name, value in kwargs.items() if name != "db"))
+            key = (func.__module__, func.__qualname__, params)
+            generation = database_generation()
+            now = time.monotonic()
+            
+            with _lock:
+                if generation != _generation:
+                    _entries.clear()
+                    _generation = generation
+                
+                entry = _entries.get(key)
+                if entry is not None and entry[0] > now:
+                    _entries.move_to_end(key)
+                    return entry[1]
+            
+            response = func(*args, **kwargs)
+            
+            with _lock:
+                # Skip storing a result computed before a reload finished
+                if generation == _generation:
+                    _entries[key] = (now + expire, response)
+                    _entries.move_to_end(key)
+                    # Evict the least recently used entries
+                    while len(_entries) > CACHE_MAX_ENTRIES:
+                        _entries.popitem(last=False)
+            
+            return response
+        
+        return wrapper
+    
+    return decorator
@@ -6,25 +6,25 @@ Advanced analytics and insights endpoints for IGS data
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import case, func, distinct
 from typing import List, Optional
-import statistics
-import sys
-from pathlib import Path
+from functools import reduce
+import heapq
+import math
+import operator
 
-# Add backend directory to path
-backend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(backend_path))
-
-from database.connection import get_db
-from database.schema import CensusTract
-from models.responses import (
+from ..config import CACHE_TTL, TRACT_CACHE_TTL
+from ..database.connection import get_db
+from ..database.schema import ALLOWED_METRICS, METRIC_COLUMNS, CensusTract, TractPercentile
+from ..models.responses import (
     TrendAnalysisResponse, TrendDataPoint,
     RankingsResponse, TractRankingItem,
     RegionalInsightsResponse, CategorySummary, DisparityMetric,
     EquityScorecard, YearOverYearComparison
 )
+from .cache import cached_response
 
 router = APIRouter(prefix="/api/insights", tags=["insights"])
 
@@ -56,21 +56,27 @@ METRIC_DISPLAY_NAMES = {
     'early_education_enrollment_score': 'Early Education Enrollment',
 }
 
+# Rows fetched per batch while streaming a tract's trend history
+TREND_BATCH_SIZE = 256
+
+# Lowest score for each letter grade, highest grade first
+GRADE_THRESHOLDS = [(80, "A"), (70, "B"), (60, "C"), (50, "D")]
+
+# Letter grade for every whole score 0-100; the thresholds are whole
+# numbers, so a score's grade is the grade of its integer part
+GRADE_LOOKUP = tuple(
+    next((grade for threshold, grade in GRADE_THRESHOLDS if score >= threshold), "F")
+    for score in range(101)
+)
+
 
 def get_grade(score: Optional[float]) -> str:
     """Convert numeric score to letter grade"""
     if score is None:
         return "N/A"
-    if score >= 80:
-        return "A"
-    elif score >= 70:
-        return "B"
-    elif score >= 60:
-        return "C"
-    elif score >= 50:
-        return "D"
-    else:
+    if not score >= 0:  # Negative or NaN
         return "F"
+    return GRADE_LOOKUP[int(min(score, 100))]
 
 
 def get_trend_direction(change: Optional[float]) -> str:
@@ -86,6 +92,7 @@ def get_trend_direction(change: Optional[float]) -> str:
 
 
 @router.get("/trends/{fips_code}", response_model=TrendAnalysisResponse)
+@cached_response(expire=TRACT_CACHE_TTL)
 def get_tract_trends(
     fips_code: str,
     metric: str = Query("inclusive_growth_score", description="Metric to analyze trends for"),
@@ -97,23 +104,32 @@ def get_tract_trends(
     Returns year-over-year changes and overall trend direction
     """
     # Validate metric
-    if not hasattr(CensusTract, metric):
+    if metric not in ALLOWED_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
     
-    # Get all years of data for this tract
-    tracts = db.query(CensusTract).filter(
+    # Stream all years of data for this tract, fetching only the needed columns
+    rows = db.query(
+        CensusTract.year,
+        CensusTract.state,
+        CensusTract.county,
+        METRIC_COLUMNS[metric].label('value')
+    ).filter(
         CensusTract.census_tract_fips == fips_code
-    ).order_by(CensusTract.year).all()
-    
-    if not tracts:
-        raise HTTPException(status_code=404, detail="Census tract not found")
+    ).order_by(CensusTract.year).yield_per(TREND_BATCH_SIZE)
     
-    # Build trend data
+    # Build trend data in one pass; only the first, previous and count of
+    # non-null values are kept for the overall change
     data_points = []
+    location = None
+    first_value = None
     prev_value = None
+    value_count = 0
     
-    for tract in tracts:
-        value = getattr(tract, metric)
+    for tract in rows:
+        if location is None:
+            location = (tract.state, tract.county)
+        
+        value = tract.value
         change = None
         change_pct = None
         
@@ -130,24 +146,29 @@ def get_tract_trends(
         ))
         
         if value is not None:
+            if first_value is None:
+                first_value = value
             prev_value = value
+            value_count += 1
+    
+    if location is None:
+        raise HTTPException(status_code=404, detail="Census tract not found")
     
     # Calculate overall change
-    values = [dp.value for dp in data_points if dp.value is not None]
     overall_change = None
     overall_change_pct = None
     avg_annual_change = None
     
-    if len(values) >= 2:
-        overall_change = values[-1] - values[0]
-        if values[0] != 0:
-            overall_change_pct = (overall_change / values[0]) * 100
-        avg_annual_change = overall_change / (len(values) - 1)
+    if value_count >= 2:
+        overall_change = prev_value - first_value
+        if first_value != 0:
+            overall_change_pct = (overall_change / first_value) * 100
+        avg_annual_change = overall_change / (value_count - 1)
     
     return TrendAnalysisResponse(
         census_tract_fips=fips_code,
-        state=tracts[0].state,
-        county=tracts[0].county,
+        state=location[0],
+        county=location[1],
         metric=metric,
         metric_display_name=METRIC_DISPLAY_NAMES.get(metric, metric),
         trend_direction=get_trend_direction(overall_change),
@@ -159,6 +180,7 @@ def get_tract_trends(
 
 
 @router.get("/rankings", response_model=RankingsResponse)
+@cached_response(expire=CACHE_TTL)
 def get_rankings(
     metric: str = Query("inclusive_growth_score", description="Metric to rank by"),
     state: Optional[str] = Query(None, description="Filter by state"),
@@ -171,50 +193,56 @@ def get_rankings(
     
     Returns rankings with percentiles
     """
-    if not hasattr(CensusTract, metric):
+    if metric not in ALLOWED_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
     
-    # Build query
-    query = db.query(CensusTract)
+    column = METRIC_COLUMNS[metric]
+    
+    # Build query over tracts with a valid metric value
+    query = db.query(
+        CensusTract.census_tract_fips,
+        CensusTract.state,
+        CensusTract.county,
+        column.label('score')
+    ).filter(column.isnot(None))
     
     if state:
         query = query.filter(CensusTract.state == state)
     if year:
         query = query.filter(CensusTract.year == year)
     
-    # Get all tracts with valid metric values
-    tracts = query.all()
-    valid_tracts = [(t, getattr(t, metric)) for t in tracts if getattr(t, metric) is not None]
+    total = query.count()
     
-    if not valid_tracts:
+    if total == 0:
         raise HTTPException(status_code=404, detail="No data found for specified filters")
     
-    # Sort by metric value
-    sorted_tracts = sorted(valid_tracts, key=lambda x: x[1], reverse=True)
-    total = len(sorted_tracts)
+    # Let the database sort and return only the top and bottom slices; ties
+    # keep table order at the top and reverse table order at the bottom
+    top_tracts = query.order_by(column.desc(), CensusTract.id).limit(limit).all()
+    bottom_tracts = query.order_by(column.asc(), CensusTract.id.desc()).limit(limit).all()
     
     # Build top performers
     top_performers = []
-    for i, (tract, score) in enumerate(sorted_tracts[:limit]):
+    for i, (fips, tract_state, county, score) in enumerate(top_tracts):
         percentile = ((total - i) / total) * 100
         top_performers.append(TractRankingItem(
             rank=i + 1,
-            census_tract_fips=tract.census_tract_fips,
-            state=tract.state,
-            county=tract.county,
+            census_tract_fips=fips,
+            state=tract_state,
+            county=county,
             score=score,
             percentile=percentile
         ))
     
     # Build bottom performers
     bottom_performers = []
-    for i, (tract, score) in enumerate(reversed(sorted_tracts[-limit:])):
+    for i, (fips, tract_state, county, score) in enumerate(bottom_tracts):
         percentile = ((i + 1) / total) * 100
         bottom_performers.append(TractRankingItem(
             rank=total - limit + i + 1,
-            census_tract_fips=tract.census_tract_fips,
-            state=tract.state,
-            county=tract.county,
+            census_tract_fips=fips,
+            state=tract_state,
+            county=county,
             score=score,
             percentile=percentile
         ))
@@ -231,6 +259,7 @@ def get_rankings(
 
 
 @router.get("/regional", response_model=RegionalInsightsResponse)
+@cached_response(expire=CACHE_TTL)
 def get_regional_insights(
     state: str = Query(..., description="State to analyze"),
     county: Optional[str] = Query(None, description="Optional county filter"),
@@ -242,8 +271,33 @@ def get_regional_insights(
     
     Returns category summaries, disparity analysis, and key insights
     """
-    # Build query
-    query = db.query(CensusTract).filter(
+    # Metrics with disparities calculated
+    disparity_metrics = [
+        'internet_access_score',
+        'affordable_housing_score',
+        'minority_women_owned_businesses_score',
+        'personal_income_score',
+        'health_insurance_coverage_score'
+    ]
+    
+    # Every reduction is computed by the database in one aggregate query;
+    # SQLite has no standard deviation, so sums of squares are returned too
+    aggregates = [func.count().label('total_tracts')]
+    for metric in ['inclusive_growth_score', 'place', 'economy', 'community'] + disparity_metrics:
+        column = METRIC_COLUMNS[metric]
+        aggregates += [
+            func.count(column).label(f'{metric}_count'),
+            func.avg(column).label(f'{metric}_avg'),
+            func.min(column).label(f'{metric}_min'),
+            func.max(column).label(f'{metric}_max'),
+            func.sum(column * column).label(f'{metric}_sum_sq'),
+            func.sum(case((column >= 50, 1), else_=0)).label(f'{metric}_above')
+        ]
+    aggregates.append(
+        func.sum(case((CensusTract.inclusive_growth_score >= 70, 1), else_=0)).label('high_performing')
+    )
+    
+    query = db.query(*aggregates).filter(
         CensusTract.state == state,
         CensusTract.year == year
     )
@@ -251,18 +305,17 @@ def get_regional_insights(
     if county:
         query = query.filter(CensusTract.county == county)
     
-    tracts = query.all()
+    row = query.one()._mapping
+    total_tracts = row['total_tracts']
     
-    if not tracts:
+    if not total_tracts:
         raise HTTPException(status_code=404, detail="No data found for specified filters")
     
-    total_tracts = len(tracts)
-    
     # Helper to calculate category summary
     def calc_category_summary(category: str, metric_name: str) -> CategorySummary:
-        values = [getattr(t, metric_name) for t in tracts if getattr(t, metric_name) is not None]
+        count = row[f'{metric_name}_count']
         
-        if not values:
+        if not count:
             return CategorySummary(
                 category=category,
                 avg_score=None,
@@ -273,23 +326,23 @@ def get_regional_insights(
                 key_insight="Insufficient data"
             )
         
-        avg = statistics.mean(values)
-        above_avg = sum(1 for v in values if v >= 50)
-        below_avg = sum(1 for v in values if v < 50)
+        avg = row[f'{metric_name}_avg']
+        above_avg = row[f'{metric_name}_above']
+        below_avg = count - above_avg
         
         # Generate insight based on data
         if avg >= 60:
-            insight = f"{category} metrics show strong performance with {above_avg}/{len(values)} tracts above state baseline"
+            insight = f"{category} metrics show strong performance with {above_avg}/{count} tracts above state baseline"
         elif avg >= 50:
             insight = f"{category} metrics are near state average with room for improvement"
         else:
-            insight = f"{category} metrics indicate opportunity for intervention - {below_avg}/{len(values)} tracts below baseline"
+            insight = f"{category} metrics indicate opportunity for intervention - {below_avg}/{count} tracts below baseline"
         
         return CategorySummary(
             category=category,
             avg_score=avg,
-            min_score=min(values),
-            max_score=max(values),
+            min_score=row[f'{metric_name}_min'],
+            max_score=row[f'{metric_name}_max'],
             above_average_count=above_avg,
             below_average_count=below_avg,
             key_insight=insight
@@ -301,22 +354,16 @@ def get_regional_insights(
     community_summary = calc_category_summary("Community", "community")
     
     # Calculate disparities for key metrics
-    disparity_metrics = [
-        'internet_access_score',
-        'affordable_housing_score',
-        'minority_women_owned_businesses_score',
-        'personal_income_score',
-        'health_insurance_coverage_score'
-    ]
-    
     disparities = []
     for metric in disparity_metrics:
-        values = [getattr(t, metric) for t in tracts if getattr(t, metric) is not None]
+        count = row[f'{metric}_count']
         
-        if len(values) >= 2:
-            disparity = max(values) - min(values)
-            mean_val = statistics.mean(values)
-            std_val = statistics.stdev(values) if len(values) > 1 else 0
+        if count >= 2:
+            disparity = row[f'{metric}_max'] - row[f'{metric}_min']
+            mean_val = row[f'{metric}_avg']
+            # Sample variance from the sum of squares, clamped against rounding
+            variance = (row[f'{metric}_sum_sq'] - count * mean_val * mean_val) / (count - 1)
+            std_val = math.sqrt(max(variance, 0.0))
             cv = (std_val / mean_val * 100) if mean_val != 0 else 0
             
             # Generate interpretation
@@ -339,12 +386,12 @@ def get_regional_insights(
     disparities.sort(key=lambda x: x.disparity_score, reverse=True)
     
     # Calculate overall IGS
-    igs_values = [t.inclusive_growth_score for t in tracts if t.inclusive_growth_score is not None]
-    avg_igs = statistics.mean(igs_values) if igs_values else None
+    igs_count = row['inclusive_growth_score_count']
+    avg_igs = row['inclusive_growth_score_avg']
     
     # Count opportunity vs high-performing tracts
-    tracts_needing_attention = sum(1 for v in igs_values if v < 50)
-    high_performing = sum(1 for v in igs_values if v >= 70)
+    tracts_needing_attention = igs_count - row['inclusive_growth_score_above']
+    high_performing = row['high_performing'] or 0
     
     # Generate key insights
     key_insights = []
@@ -385,6 +432,7 @@ def get_regional_insights(
 
 
 @router.get("/scorecard/{fips_code}", response_model=EquityScorecard)
+@cached_response(expire=TRACT_CACHE_TTL)
 def get_equity_scorecard(
     fips_code: str,
     year: int = Query(2024, description="Year for scorecard"),
@@ -395,37 +443,7 @@ def get_equity_scorecard(
     
     Returns letter grades and comparison to state averages
     """
-    # Get tract data
-    tract = db.query(CensusTract).filter(
-        CensusTract.census_tract_fips == fips_code,
-        CensusTract.year == year
-    ).first()
-    
-    if not tract:
-        raise HTTPException(status_code=404, detail="Census tract not found for specified year")
-    
-    # Get state averages for comparison
-    state_tracts = db.query(CensusTract).filter(
-        CensusTract.state == tract.state,
-        CensusTract.year == year
-    ).all()
-    
-    # Calculate state percentile for IGS
-    igs_values = sorted([t.inclusive_growth_score for t in state_tracts if t.inclusive_growth_score is not None])
-    
-    state_percentile = None
-    state_avg = None
-    vs_state_avg = None
-    
-    if igs_values:
-        state_avg = statistics.mean(igs_values)
-        if tract.inclusive_growth_score is not None:
-            vs_state_avg = tract.inclusive_growth_score - state_avg
-            # Calculate percentile
-            below_count = sum(1 for v in igs_values if v < tract.inclusive_growth_score)
-            state_percentile = (below_count / len(igs_values)) * 100
-    
-    # Identify strengths and weaknesses
+    # Metrics checked for strengths and weaknesses
     metrics_to_check = [
         ('internet_access_score', 'Internet Access'),
         ('affordable_housing_score', 'Affordable Housing'),
@@ -436,20 +454,70 @@ def get_equity_scorecard(
         ('early_education_enrollment_score', 'Early Education'),
     ]
     
-    strengths = []
-    weaknesses = []
+    # Get tract data, with its precomputed state comparison when the loader
+    # has built one; only the columns the scorecard reads are loaded
+    row = db.query(CensusTract, TractPercentile).outerjoin(
+        TractPercentile, TractPercentile.id == CensusTract.id
+    ).options(
+        load_only(
+            CensusTract.state,
+            CensusTract.county,
+            CensusTract.inclusive_growth_score,
+            CensusTract.place,
+            CensusTract.economy,
+            CensusTract.community,
+            *[METRIC_COLUMNS[metric] for metric, _ in metrics_to_check]
+        )
+    ).filter(
+        CensusTract.census_tract_fips == fips_code,
+        CensusTract.year == year
+    ).first()
     
-    for metric, name in metrics_to_check:
-        value = getattr(tract, metric)
-        if value is not None:
-            if value >= 60:
-                strengths.append(f"{name}: {value:.0f}")
-            elif value < 45:
-                weaknesses.append(f"{name}: {value:.0f}")
+    if not row:
+        raise HTTPException(status_code=404, detail="Census tract not found for specified year")
+    
+    tract, percentile = row
+    
+    state_percentile = None
+    vs_state_avg = None
     
-    # Sort by score (highest strengths, lowest weaknesses)
-    strengths.sort(key=lambda x: float(x.split(': ')[1]), reverse=True)
-    weaknesses.sort(key=lambda x: float(x.split(': ')[1]))
+    if tract.inclusive_growth_score is not None and percentile is not None:
+        vs_state_avg = tract.inclusive_growth_score - percentile.state_avg
+        state_percentile = percentile.state_percentile
+    elif tract.inclusive_growth_score is not None:
+        # No precomputed row (database loaded before the table existed), so
+        # the state's average and the tracts scoring below this one are
+        # aggregated in a single query
+        igs = CensusTract.inclusive_growth_score
+        state_avg, state_count, below_count = db.query(
+            func.avg(igs),
+            func.count(igs),
+            func.sum(case((igs < tract.inclusive_growth_score, 1), else_=0))
+        ).filter(
+            CensusTract.state == tract.state,
+            CensusTract.year == year
+        ).one()
+        vs_state_avg = tract.inclusive_growth_score - state_avg
+        state_percentile = (below_count / state_count) * 100
+    
+    # Identify strengths and weaknesses; all checked values are read in one call
+    metric_values = operator.attrgetter(*(metric for metric, _ in metrics_to_check))(tract)
+    scores = [
+        (value, name)
+        for value, (_, name) in zip(metric_values, metrics_to_check)
+        if value is not None
+    ]
+    
+    # Keep the three highest strengths and lowest weaknesses, formatting only
+    # the selected scores
+    strengths = [
+        f"{name}: {value:.0f}"
+        for value, name in heapq.nlargest(3, (s for s in scores if s[0] >= 60), key=operator.itemgetter(0))
+    ]
+    weaknesses = [
+        f"{name}: {value:.0f}"
+        for value, name in heapq.nsmallest(3, (s for s in scores if s[0] < 45), key=operator.itemgetter(0))
+    ]
     
     return EquityScorecard(
         census_tract_fips=fips_code,
@@ -464,14 +532,15 @@ def get_equity_scorecard(
         economy_score=tract.economy,
         community_grade=get_grade(tract.community),
         community_score=tract.community,
-        top_strengths=strengths[:3],
-        areas_for_improvement=weaknesses[:3],
+        top_strengths=strengths,
+        areas_for_improvement=weaknesses,
         vs_state_avg=vs_state_avg,
         state_percentile=state_percentile
     )
 
 
 @router.get("/year-over-year", response_model=List[YearOverYearComparison])
+@cached_response(expire=CACHE_TTL)
 def get_year_over_year(
     state: str = Query(..., description="State to analyze"),
     year_start: int = Query(2017, description="Starting year"),
@@ -492,29 +561,24 @@ def get_year_over_year(
         'health_insurance_coverage_score'
     ]
     
+    # Average every metric for both years in one grouped query
+    rows = db.query(
+        CensusTract.year,
+        *[func.avg(METRIC_COLUMNS[metric]).label(metric) for metric in metrics]
+    ).filter(
+        CensusTract.state == state,
+        CensusTract.year.in_([year_start, year_end])
+    ).group_by(CensusTract.year).all()
+    
+    averages_by_year = {row.year: row._mapping for row in rows}
+    start_averages = averages_by_year.get(year_start, {})
+    end_averages = averages_by_year.get(year_end, {})
+    
     results = []
     
     for metric in metrics:
-        if not hasattr(CensusTract, metric):
-            continue
-        
-        # Get start year data
-        start_tracts = db.query(CensusTract).filter(
-            CensusTract.state == state,
-            CensusTract.year == year_start
-        ).all()
-        
-        # Get end year data
-        end_tracts = db.query(CensusTract).filter(
-            CensusTract.state == state,
-            CensusTract.year == year_end
-        ).all()
-        
-        start_values = [getattr(t, metric) for t in start_tracts if getattr(t, metric) is not None]
-        end_values = [getattr(t, metric) for t in end_tracts if getattr(t, metric) is not None]
-        
-        start_avg = statistics.mean(start_values) if start_values else None
-        end_avg = statistics.mean(end_values) if end_values else None
+        start_avg = start_averages.get(metric)
+        end_avg = end_averages.get(metric)
         
         abs_change = None
         pct_change = None
@@ -545,6 +609,7 @@ def get_year_over_year(
 
 
 @router.get("/dei-opportunity")
+@cached_response(expire=CACHE_TTL)
 def get_dei_opportunity_rankings(
     year: Optional[int] = Query(None, description="Year to analyze (defaults to latest)"),
     db: Session = Depends(get_db)
@@ -568,12 +633,6 @@ def get_dei_opportunity_rankings(
         max_year = db.query(func.max(CensusTract.year)).scalar()
         year = max_year or 2024
     
-    # Get all tracts for the specified year
-    tracts = db.query(CensusTract).filter(CensusTract.year == year).all()
-    
-    if not tracts:
-        raise HTTPException(status_code=404, detail="No data found for specified year")
-    
     # Define weights for DEI calculation
     weights = {
         'minority_women_owned_businesses_score': 0.25,
@@ -585,58 +644,45 @@ def get_dei_opportunity_rankings(
         'new_businesses_score': 0.05
     }
     
-    # Calculate DEI score for each tract
-    tract_scores = []
-    for tract in tracts:
-        total_weight = 0
-        weighted_sum = 0
-        
-        for metric, weight in weights.items():
-            value = getattr(tract, metric)
-            if value is not None:
-                weighted_sum += value * weight
-                total_weight += weight
-        
-        dei_score = weighted_sum / total_weight if total_weight > 0 else None
-        
-        tract_scores.append({
-            'census_tract_fips': tract.census_tract_fips,
-            'county': tract.county,
-            'state': tract.state,
-            'dei_score': dei_score,
-            'inclusive_growth_score': tract.inclusive_growth_score,
-            'minority_women_owned_businesses_score': tract.minority_women_owned_businesses_score,
-            'internet_access_score': tract.internet_access_score,
-            'affordable_housing_score': tract.affordable_housing_score,
-            'personal_income_score': tract.personal_income_score,
-            'health_insurance_coverage_score': tract.health_insurance_coverage_score,
-            'new_businesses_score': tract.new_businesses_score
-        })
-    
-    # Aggregate by county
-    county_data = {}
-    for ts in tract_scores:
-        key = (ts['county'], ts['state'])
-        if key not in county_data:
-            county_data[key] = {
-                'county': ts['county'],
-                'state': ts['state'],
-                'scores': [],
-                'metrics': {k: [] for k in weights.keys()}
-            }
-        
-        if ts['dei_score'] is not None:
-            county_data[key]['scores'].append(ts['dei_score'])
-        
-        for metric in weights.keys():
-            if ts[metric] is not None:
-                county_data[key]['metrics'][metric].append(ts[metric])
+    # Per-tract DEI score: weighted mean of the metrics the tract has, NULL
+    # when it has none of them
+    columns = {metric: METRIC_COLUMNS[metric] for metric in weights}
+    weighted_sum = reduce(operator.add, [
+        case((column.isnot(None), column * weights[metric]), else_=0)
+        for metric, column in columns.items()
+    ])
+    total_weight = reduce(operator.add, [
+        case((column.isnot(None), weights[metric]), else_=0)
+        for metric, column in columns.items()
+    ])
+    dei_score = weighted_sum / func.nullif(total_weight, 0)
+    
+    # Aggregate by county in the database; the first tract id keeps counties
+    # in table order among equal scores
+    rows = db.query(
+        CensusTract.county,
+        CensusTract.state,
+        func.avg(dei_score).label('dei_score'),
+        func.count(dei_score).label('tract_count'),
+        func.min(CensusTract.id).label('first_id'),
+        *[func.avg(column).label(metric) for metric, column in columns.items()]
+    ).filter(
+        CensusTract.year == year
+    ).group_by(
+        CensusTract.county, CensusTract.state
+    ).order_by('first_id').all()
+    
+    if not rows:
+        raise HTTPException(status_code=404, detail="No data found for specified year")
+    
+    # Reads every metric average from a row in one call, in weights order
+    metric_averages = operator.attrgetter(*weights)
     
     # Calculate county averages
     county_rankings = []
-    for key, data in county_data.items():
-        if data['scores']:
-            avg_dei = statistics.mean(data['scores'])
+    for row in rows:
+        if row.tract_count:
+            avg_dei = row.dei_score
             
             # Determine category
             if avg_dei >= 65:
@@ -649,14 +695,14 @@ def get_dei_opportunity_rankings(
                 category = "Developing"
             
             county_rankings.append({
-                'county': data['county'],
-                'state': data['state'],
+                'county': row.county,
+                'state': row.state,
                 'dei_score': round(avg_dei, 1),
                 'category': category,
-                'tract_count': len(data['scores']),
+                'tract_count': row.tract_count,
                 'metrics': {
-                    metric: round(statistics.mean(values), 1) if values else None
-                    for metric, values in data['metrics'].items()
+                    metric: round(value, 1) if value is not None else None
+                    for metric, value in zip(weights, metric_averages(row))
                 }
             })
     
@@ -667,9 +713,11 @@ def get_dei_opportunity_rankings(
     for i, county in enumerate(county_rankings):
         county['rank'] = i + 1
     
-    return {
+    # The plain dict payload is encoded by orjson directly instead of first
+    # being walked by FastAPI's jsonable_encoder; cache hits reuse the bytes
+    return ORJSONResponse({
         'year': year,
         'total_counties': len(county_rankings),
         'rankings': county_rankings
-    }
+    })
 
@@ -3,44 +3,68 @@ Census Tract API Routes
 CIS 301 Capstone Project - Clark Atlanta CIS301
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct
 from typing import List, Optional
-import sys
-from pathlib import Path
+import math
 
-# Add backend directory to path
-backend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(backend_path))
-
-from database.connection import get_db
-from database.schema import CensusTract
-from models.responses import (
-    TractResponse, TractListResponse, StateResponse,
+from ..config import CACHE_TTL, HEALTH_CACHE_TTL, TRACT_CACHE_TTL
+from ..database.connection import get_db, SessionLocal
+from ..database.schema import ALLOWED_METRICS, METRIC_COLUMNS, CensusTract
+from ..database.analytics import metric_statistics, metric_correlation
+from ..models.responses import (
+    TractResponse, TractListResponse, TractListAdapter, StateResponse,
     MetricResponse, StatisticsResponse, CorrelationResponse, HealthResponse
 )
+from .cache import cached_response
 
 router = APIRouter(prefix="/api", tags=["tracts"])
 
+# Media type clients send in Accept to stream tract lists
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows fetched from the database per batch while streaming
+STREAM_BATCH_SIZE = 1000
+
+# Only the columns TractResponse exposes; selecting them returns compact
+# tuple-based rows instead of full ORM instances with per-object state
+TRACT_RESPONSE_COLUMNS = [getattr(CensusTract, name) for name in TractResponse.model_fields]
+
+
+@cached_response(expire=HEALTH_CACHE_TTL)
+def database_summary(db: Session) -> tuple:
+    """
+    Count the loaded records and list the states they cover
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Tuple of (total records, sorted state names)
+    """
+    total_records = db.query(func.count(CensusTract.id)).scalar()
+    states = db.query(distinct(CensusTract.state)).all()
+    return total_records, sorted(s[0] for s in states if s[0])
+
 
 @router.get("/health", response_model=HealthResponse)
 def health_check(db: Session = Depends(get_db)):
     """
     Health check endpoint
     
-    Returns API status and database connection information
+    Returns API status and database connection information; the record
+    summary is cached briefly, while failures are never cached
     """
     try:
-        total_records = db.query(CensusTract).count()
-        states = db.query(distinct(CensusTract.state)).all()
-        state_list = [s[0] for s in states if s[0]]
+        total_records, state_list = database_summary(db=db)
         
         return HealthResponse(
             status="healthy",
             database_connected=True,
             total_records=total_records,
-            states_available=sorted(state_list)
+            states_available=state_list
         )
     except Exception as e:
         return HealthResponse(
@@ -51,21 +75,72 @@ def health_check(db: Session = Depends(get_db)):
         )
 
 
-@router.get("/tracts", response_model=TractListResponse)
-def get_tracts(
-    state: Optional[str] = Query(None, description="Filter by state name"),
-    county: Optional[str] = Query(None, description="Filter by county name"),
-    year: Optional[int] = Query(None, description="Filter by year (2017-2024)"),
-    limit: int = Query(100, le=500, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
-    db: Session = Depends(get_db)
+def stream_tracts(
+    state: Optional[str],
+    county: Optional[str],
+    year: Optional[int],
+    limit: int,
+    offset: int
 ):
     """
-    Get census tracts with optional filters
+    Yield matching census tracts as NDJSON lines
+    
+    Rows are fetched in batches on a session owned by the generator, so
+    only one batch is held in memory while the response is sent.
     
-    Returns a list of census tracts matching the specified criteria
+    Args:
+        state: Filter by state name
+        county: Filter by county name
+        year: Filter by year
+        limit: Maximum number of rows
+        offset: Rows to skip
+        
+    Yields:
+        One JSON-encoded tract per line
+    """
+    with SessionLocal() as session:
+        query = session.query(*TRACT_RESPONSE_COLUMNS)
+        
+        # Apply filters
+        if state:
+            query = query.filter(CensusTract.state == state)
+        if county:
+            query = query.filter(CensusTract.county == county)
+        if year:
+            query = query.filter(CensusTract.year == year)
+        
+        # Ordered by id so pages do not depend on which index the planner picks
+        for tract in query.order_by(CensusTract.id).offset(offset).limit(limit).yield_per(STREAM_BATCH_SIZE):
+            # Same fields and coercion as the JSON response, encoded by pydantic-core
+            yield TractResponse.model_validate(tract).model_dump_json() + "\n"
+
+
+@cached_response(expire=CACHE_TTL)
+def tract_page(
+    state: Optional[str],
+    county: Optional[str],
+    year: Optional[int],
+    limit: int,
+    offset: int,
+    db: Session
+) -> Response:
+    """
+    Build the JSON response for one page of matching census tracts
+    
+    Args:
+        state: Filter by state name
+        county: Filter by county name
+        year: Filter by year
+        limit: Maximum number of rows
+        offset: Rows to skip
+        db: Database session
+        
+    Returns:
+        Finished JSON response with the total and the page of tracts
     """
-    query = db.query(CensusTract)
+    # The window count is evaluated over every filtered row before
+    # pagination, so each row of the page also carries the total
+    query = db.query(*TRACT_RESPONSE_COLUMNS, func.count().over().label('total'))
     
     # Apply filters
     if state:
@@ -75,19 +150,52 @@ def get_tracts(
     if year:
         query = query.filter(CensusTract.year == year)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    tracts = query.offset(offset).limit(limit).all()
+    # Apply pagination and get the total count in the same query; ordering
+    # by id keeps pages stable whichever index the planner picks
+    tracts = query.order_by(CensusTract.id).offset(offset).limit(limit).all()
+    if tracts:
+        total = tracts[0].total
+    else:
+        # An empty page (limit=0, or past the last page) has no row to
+        # carry the total
+        total = query.with_entities(func.count(CensusTract.id)).scalar()
     
-    return TractListResponse(
+    # The rows are validated once, as a batch, and returned as a finished
+    # response so FastAPI does not dump and re-validate them
+    response = TractListResponse(
         total=total,
         tracts=tracts
     )
+    return Response(response.model_dump_json(), media_type="application/json")
+
+
+@router.get("/tracts", response_model=TractListResponse)
+def get_tracts(
+    request: Request,
+    state: Optional[str] = Query(None, description="Filter by state name"),
+    county: Optional[str] = Query(None, description="Filter by county name"),
+    year: Optional[int] = Query(None, description="Filter by year (2017-2024)"),
+    limit: int = Query(100, le=500, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get census tracts with optional filters
+    
+    Returns a list of census tracts matching the specified criteria, or
+    one tract per line when the client accepts application/x-ndjson
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_tracts(state, county, year, limit, offset),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+    
+    return tract_page(state=state, county=county, year=year, limit=limit, offset=offset, db=db)
 
 
 @router.get("/tracts/{fips_code}", response_model=List[TractResponse])
+@cached_response(expire=TRACT_CACHE_TTL)
 def get_tract_by_fips(
     fips_code: str,
     year: Optional[int] = Query(None, description="Filter by specific year"),
@@ -98,7 +206,7 @@ def get_tract_by_fips(
     
     Returns all years of data for a specific census tract, or a single year if specified
     """
-    query = db.query(CensusTract).filter(CensusTract.census_tract_fips == fips_code)
+    query = db.query(*TRACT_RESPONSE_COLUMNS).filter(CensusTract.census_tract_fips == fips_code)
     
     if year:
         query = query.filter(CensusTract.year == year)
@@ -108,10 +216,15 @@ def get_tract_by_fips(
     if not tracts:
         raise HTTPException(status_code=404, detail="Census tract not found")
     
-    return tracts
+    # Validate and serialize all years in one pass
+    return Response(
+        TractListAdapter.dump_json(TractListAdapter.validate_python(tracts)),
+        media_type="application/json"
+    )
 
 
 @router.get("/states", response_model=List[StateResponse])
+@cached_response(expire=CACHE_TTL)
 def get_states(db: Session = Depends(get_db)):
     """
     Get list of all available states
@@ -130,6 +243,7 @@ def get_states(db: Session = Depends(get_db)):
 
 
 @router.get("/metrics", response_model=List[MetricResponse])
+@cached_response(expire=CACHE_TTL)
 def get_metrics(
     metric: str = Query(..., description="Metric name (e.g., 'internet_access_score')"),
     state: Optional[str] = Query(None, description="Filter by state"),
@@ -144,10 +258,17 @@ def get_metrics(
     Returns metric values for specified geography and time filters
     """
     # Validate metric exists
-    if not hasattr(CensusTract, metric):
+    if metric not in ALLOWED_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
     
-    query = db.query(CensusTract)
+    # Only the identifying columns and the requested metric are fetched
+    query = db.query(
+        CensusTract.census_tract_fips,
+        CensusTract.state,
+        CensusTract.county,
+        CensusTract.year,
+        METRIC_COLUMNS[metric].label('metric_value')
+    )
     
     # Apply filters
     if state:
@@ -161,20 +282,20 @@ def get_metrics(
     
     results = []
     for tract in tracts:
-        metric_value = getattr(tract, metric)
         results.append(MetricResponse(
             census_tract_fips=tract.census_tract_fips,
             state=tract.state,
             county=tract.county,
             year=tract.year,
             metric_name=metric,
-            metric_value=metric_value
+            metric_value=tract.metric_value
         ))
     
     return results
 
 
 @router.get("/statistics", response_model=StatisticsResponse)
+@cached_response(expire=CACHE_TTL)
 def get_statistics(
     metric: str = Query(..., description="Metric to analyze"),
     state: Optional[str] = Query(None, description="Filter by state"),
@@ -188,10 +309,18 @@ def get_statistics(
     Returns mean, median, min, max, and standard deviation for the specified metric
     """
     # Validate metric exists
-    if not hasattr(CensusTract, metric):
+    if metric not in ALLOWED_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
     
-    query = db.query(CensusTract)
+    # Aggregate in DuckDB when the analytics view is available
+    aggregates = metric_statistics(metric, state, county, year)
+    if aggregates is not None:
+        if aggregates["count"] == 0:
+            raise HTTPException(status_code=404, detail="No data found for specified filters")
+        return StatisticsResponse(state=state, county=county, year=year, metric=metric, **aggregates)
+    
+    column = METRIC_COLUMNS[metric]
+    query = db.query(column).filter(column.isnot(None))
     
     # Apply filters
     if state:
@@ -201,31 +330,45 @@ def get_statistics(
     if year:
         query = query.filter(CensusTract.year == year)
     
-    # Get all values for the metric
-    tracts = query.all()
-    values = [getattr(tract, metric) for tract in tracts if getattr(tract, metric) is not None]
+    # Count, mean, extremes and sum of squares in one aggregate query
+    count, mean, minimum, maximum, sum_sq = query.with_entities(
+        func.count(column),
+        func.avg(column),
+        func.min(column),
+        func.max(column),
+        func.sum(column * column)
+    ).one()
     
-    if not values:
+    if count == 0:
         raise HTTPException(status_code=404, detail="No data found for specified filters")
     
-    # Calculate statistics
-    import statistics
+    # Median from the middle value, or the two middle values when the count
+    # is even, read in sorted order
+    middle = [
+        value for (value,) in query.order_by(column).offset((count - 1) // 2).limit(2 - count % 2)
+    ]
+    
+    # Sample variance from the sum of squares, clamped against rounding
+    std_dev = 0.0
+    if count > 1:
+        std_dev = math.sqrt(max((sum_sq - count * mean * mean) / (count - 1), 0.0))
     
     return StatisticsResponse(
         state=state,
         county=county,
         year=year,
         metric=metric,
-        count=len(values),
-        mean=statistics.mean(values),
-        median=statistics.median(values),
-        min=min(values),
-        max=max(values),
-        std_dev=statistics.stdev(values) if len(values) > 1 else 0.0
+        count=count,
+        mean=mean,
+        median=sum(middle) / len(middle),
+        min=minimum,
+        max=maximum,
+        std_dev=std_dev
     )
 
 
 @router.get("/correlations", response_model=CorrelationResponse)
+@cached_response(expire=CACHE_TTL)
 def get_correlation(
     metric_x: str = Query(..., description="First metric for correlation"),
     metric_y: str = Query(..., description="Second metric for correlation"),
@@ -239,12 +382,38 @@ def get_correlation(
     Returns Pearson correlation coefficient for the specified metrics
     """
     # Validate metrics exist
-    if not hasattr(CensusTract, metric_x):
+    if metric_x not in ALLOWED_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric_x}")
-    if not hasattr(CensusTract, metric_y):
+    if metric_y not in ALLOWED_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric_y}")
     
-    query = db.query(CensusTract)
+    # Correlate in DuckDB when the analytics view is available
+    result = metric_correlation(metric_x, metric_y, state, year)
+    if result is not None:
+        correlation, sample_size = result
+        if sample_size < 2:
+            raise HTTPException(status_code=404, detail="Insufficient data for correlation analysis")
+        return CorrelationResponse(
+            metric_x=metric_x,
+            metric_y=metric_y,
+            correlation_coefficient=correlation,
+            sample_size=sample_size,
+            state_filter=state,
+            year_filter=year
+        )
+    
+    column_x = METRIC_COLUMNS[metric_x]
+    column_y = METRIC_COLUMNS[metric_y]
+    
+    # Sums over the pairs where both metrics are not None, in one aggregate query
+    query = db.query(
+        func.count(),
+        func.sum(column_x),
+        func.sum(column_y),
+        func.sum(column_x * column_y),
+        func.sum(column_x * column_x),
+        func.sum(column_y * column_y)
+    ).filter(column_x.isnot(None), column_y.isnot(None))
     
     # Apply filters
     if state:
@@ -252,39 +421,22 @@ def get_correlation(
     if year:
         query = query.filter(CensusTract.year == year)
     
-    # Get all tracts
-    tracts = query.all()
-    
-    # Extract values where both metrics are not None
-    pairs = []
-    for tract in tracts:
-        x_val = getattr(tract, metric_x)
-        y_val = getattr(tract, metric_y)
-        if x_val is not None and y_val is not None:
-            pairs.append((x_val, y_val))
+    n, sum_x, sum_y, sum_xy, sum_xx, sum_yy = query.one()
     
-    if len(pairs) < 2:
+    if n < 2:
         raise HTTPException(status_code=404, detail="Insufficient data for correlation analysis")
     
-    # Calculate Pearson correlation
-    import statistics
-    
-    x_values = [p[0] for p in pairs]
-    y_values = [p[1] for p in pairs]
-    
-    # Pearson correlation formula
-    n = len(pairs)
-    mean_x = statistics.mean(x_values)
-    mean_y = statistics.mean(y_values)
-    
-    numerator = sum((x - mean_x) * (y - mean_y) for x, y in pairs)
-    denominator_x = sum((x - mean_x) ** 2 for x in x_values)
-    denominator_y = sum((y - mean_y) ** 2 for y in y_values)
+    # Pearson correlation from the sums: co-deviation over the product of
+    # the deviations, each corrected by its mean term
+    numerator = sum_xy - sum_x * sum_y / n
+    denominator_x = sum_xx - sum_x * sum_x / n
+    denominator_y = sum_yy - sum_y * sum_y / n
     
-    if denominator_x == 0 or denominator_y == 0:
+    if denominator_x <= 0 or denominator_y <= 0:
         correlation = 0.0
     else:
-        correlation = numerator / (denominator_x * denominator_y) ** 0.5
+        # Clamped against rounding just outside [-1, 1]
+        correlation = max(-1.0, min(1.0, numerator / math.sqrt(denominator_x * denominator_y)))
     
     return CorrelationResponse(
         metric_x=metric_x,
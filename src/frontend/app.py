@@ -6,16 +6,10 @@ Multi-page dashboard for IGS data visualization
 """
 
 import streamlit as st
-import sys
-from pathlib import Path
-
-# Add frontend directory to path
-frontend_path = Path(__file__).parent
-sys.path.insert(0, str(frontend_path))
 
 from config import (
     PAGE_TITLE, PAGE_ICON, LAYOUT,
-    DASHBOARD_TITLE, DASHBOARD_SUBTITLE, PROJECT_INFO
+    DASHBOARD_TITLE, DASHBOARD_SUBTITLE, PROJECT_INFO, HEALTH_CACHE_TTL
 )
 from utils.api_client import api_client
 
@@ -27,6 +21,18 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_data(ttl=HEALTH_CACHE_TTL)
+def cached_health_check():
+    """
+    Health check shared by the sidebar and dataset overview
+    
+    Streamlit reuses the result across reruns until the TTL expires; a
+    failed check raises and is not cached, so it is retried next render.
+    """
+    return api_client.health_check()
+
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -58,21 +64,22 @@ st.markdown("""
 
 # Sidebar
 with st.sidebar:
-    st.markdown(f"### {PAGE_ICON} {PAGE_TITLE}")
-    st.markdown("---")
-    
-    # Navigation with Home highlighted
-    st.markdown("**🏠 Home** ← You are here")
-    st.markdown("📍 Equity Map")
-    st.markdown("📊 County Gap Analysis")
-    st.markdown("🔗 Correlation Explorer")
-    st.markdown("💡 DEI Opportunity Index")
-    
-    st.markdown("---")
+    # Title and navigation with Home highlighted, sent as one element;
+    # blank lines keep each entry its own paragraph
+    st.markdown("\n\n".join([
+        f"### {PAGE_ICON} {PAGE_TITLE}",
+        "---",
+        "**🏠 Home** ← You are here",
+        "📍 Equity Map",
+        "📊 County Gap Analysis",
+        "🔗 Correlation Explorer",
+        "💡 DEI Opportunity Index",
+        "---"
+    ]))
     
     # API Health Check
     try:
-        health = api_client.health_check()
+        health = cached_health_check()
         if health.get('database_connected'):
             st.success("✓ Connected to API")
             st.metric("Total Records", health.get('total_records', 0))
@@ -116,23 +123,26 @@ with col1:
     """)
 
 with col2:
-    st.markdown('<div class="info-box">', unsafe_allow_html=True)
+    # One element, so the box actually wraps its content; separate calls
+    # render the opening and closing tags as empty elements of their own
     st.markdown("""
+    <div class="info-box">
+    
     **Quick Start**
     
     1. Check that the API is connected (see sidebar)
     2. Navigate to a visualization page using the sidebar
     3. Use filters to explore the data
     4. Download insights for your analysis
-    """)
-    st.markdown('</div>', unsafe_allow_html=True)
+    
+    </div>
+    """, unsafe_allow_html=True)
 
 # Dataset Overview
-st.markdown("---")
-st.markdown("### Dataset Overview")
+st.markdown("---\n\n### Dataset Overview")
 
 try:
-    health = api_client.health_check()
+    health = cached_health_check()
     states = health.get('states_available', [])
     
     col1, col2, col3, col4 = st.columns(4)
@@ -156,8 +166,7 @@ except Exception as e:
     st.warning("Unable to load dataset overview. Please ensure the backend is running.")
 
 # Performance Report Section
-st.markdown("---")
-st.markdown("### 📈 Performance Report")
+st.markdown("---\n\n### 📈 Performance Report")
 
 st.markdown("""
 This comprehensive analysis of the Mastercard Inclusive Growth Score (IGS) dataset reveals significant 
@@ -5,6 +5,7 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
+HEALTH_CACHE_TTL = 30  # Seconds a health check result is reused across reruns
 
 # Page Configuration
 PAGE_TITLE = "IGS Data Dashboard"
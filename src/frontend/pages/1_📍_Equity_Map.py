@@ -10,12 +10,6 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-import sys
-from pathlib import Path
-
-# Add frontend directory to path
-frontend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(frontend_path))
 
 from utils.api_client import api_client
 from config import PAGE_TITLE, PAGE_ICON, LAYOUT, METRIC_NAMES
@@ -10,12 +10,6 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import numpy as np
-import sys
-from pathlib import Path
-
-# Add frontend directory to path
-frontend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(frontend_path))
 
 from utils.api_client import api_client
 from config import PAGE_TITLE, LAYOUT
@@ -242,8 +236,8 @@ with col2:
 filtered_df = county_scores[county_scores['Category'].isin(category_filter)]
 filtered_df = filtered_df.sort_values(sort_by, ascending=False)
 
-# Display rankings
-for idx, row in filtered_df.iterrows():
+# Display rankings (plain dict records avoid building a Series per row)
+for row in filtered_df.to_dict('records'):
     rank = row['Rank']
     score = row['DEI Score']
     category, icon = get_score_category(score)
@@ -369,7 +363,7 @@ with col1:
     st.markdown("### 🌟 Best Counties for DEI")
     
     top_counties = county_scores.head(3)
-    for _, row in top_counties.iterrows():
+    for row in top_counties.to_dict('records'):
         mwb_val = f"{row['Minority/Women Biz']:.0f}" if pd.notna(row['Minority/Women Biz']) else 'N/A'
         st.success(f"""
         **{row['County']}, {row['State']}**  
@@ -387,7 +381,7 @@ with col2:
     ]
     
     if len(growth_potential) > 0:
-        for _, row in growth_potential.head(3).iterrows():
+        for row in growth_potential.head(3).to_dict('records'):
             mwb_val = f"{row['Minority/Women Biz']:.0f}" if pd.notna(row['Minority/Women Biz']) else 'N/A'
             internet_val = f"{row['Internet Access']:.0f}" if pd.notna(row['Internet Access']) else 'N/A'
             housing_val = f"{row['Affordable Housing']:.0f}" if pd.notna(row['Affordable Housing']) else 'N/A'
@@ -7,12 +7,6 @@ Handles all HTTP requests to the FastAPI backend
 
 import requests
 from typing import Dict, List, Optional, Any
-import sys
-from pathlib import Path
-
-# Add frontend directory to path
-frontend_path = Path(__file__).parent.parent
-sys.path.insert(0, str(frontend_path))
 
 from config import API_BASE_URL
 
@@ -170,7 +170,7 @@ def main():
     # Test ETL
     if not test_etl_pipeline():
         all_passed = False
-        print("\n[ERROR] ETL tests failed. Run: python src/backend/etl/run_etl.py")
+        print("\n[ERROR] ETL tests failed. Run: cd src && python -m backend.etl.run_etl")
     
     # Test API
     if not test_api_endpoints():
@@ -5,6 +5,9 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 Essential tests for FastAPI REST API endpoints
 """
 
+import json
+import os
+import shutil
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
@@ -13,11 +16,28 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from backend.config import DATABASE_PATH
 from backend.main import app
+from backend.routes import cache
 
 client = TestClient(app)
 
 
+@pytest.fixture
+def database_copy(tmp_path, monkeypatch):
+    """Point the response cache's change detection at a temporary database copy"""
+    copy_path = tmp_path / DATABASE_PATH.name
+    shutil.copy(DATABASE_PATH, copy_path)
+    monkeypatch.setattr(cache, "DATABASE_FILES", (str(copy_path), f"{copy_path}-wal"))
+    return copy_path
+
+
+def touch(path):
+    """Move a file's modification time forward by one second"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
 class TestAPIEndpoints:
     """Core API endpoint tests"""
     
@@ -46,6 +66,29 @@ class TestAPIEndpoints:
         for tract in data["tracts"]:
             assert tract["year"] == 2023
     
+    def test_get_tracts_pagination_order(self):
+        """Filtered pages follow id order without overlap"""
+        first = client.get("/api/tracts?state=Texas&limit=3").json()["tracts"]
+        second = client.get("/api/tracts?state=Texas&limit=3&offset=3").json()["tracts"]
+        ids = [tract["id"] for tract in first + second]
+        assert ids == sorted(set(ids))
+    
+    def test_get_tracts_empty_page_total(self):
+        """Empty pages still report the total number of matching tracts"""
+        expected = client.get("/api/tracts?state=Texas").json()["total"]
+        assert expected > 0
+        assert client.get("/api/tracts?state=Texas&limit=0").json()["total"] == expected
+        assert client.get("/api/tracts?state=Texas&offset=100000").json()["total"] == expected
+        assert client.get("/api/tracts?state=Nowhere").json()["total"] == 0
+    
+    def test_get_tracts_ndjson(self):
+        """Tracts endpoint streams the same rows as NDJSON on request"""
+        expected = client.get("/api/tracts?limit=5").json()["tracts"]
+        response = client.get("/api/tracts?limit=5", headers={"Accept": "application/x-ndjson"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert [json.loads(line) for line in response.text.splitlines()] == expected
+    
     def test_get_states(self):
         """States endpoint returns list with counts"""
         response = client.get("/api/states")
@@ -68,3 +111,33 @@ class TestAPIEndpoints:
         """Invalid metric returns 400 error"""
         response = client.get("/api/statistics?metric=fake_metric")
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_non_column_metric_returns_400(self):
+        """Model attributes that are not numeric columns are rejected"""
+        for metric in ["metadata", "state"]:
+            response = client.get(f"/api/insights/rankings?metric={metric}")
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_insights_cache(self, database_copy):
+        """Insights responses are cached per parameter set until the database changes"""
+        first = client.get("/api/insights/rankings?metric=inclusive_growth_score&limit=3")
+        second = client.get("/api/insights/rankings?limit=3&metric=inclusive_growth_score")
+        assert first.json() == second.json()
+        cached = set(cache._entries)
+        assert cached
+        
+        # A write to the database file empties the cache on the next lookup
+        touch(database_copy)
+        client.get("/api/insights/rankings?metric=inclusive_growth_score&limit=4")
+        assert not cached & set(cache._entries)
+    
+    def test_tract_cache_follows_database(self, database_copy):
+        """Cached tract responses are dropped once the database changes"""
+        fips = client.get("/api/tracts?limit=1").json()["tracts"][0]["census_tract_fips"]
+        client.get(f"/api/tracts/{fips}")
+        cached = {key for key in cache._entries if key[1] == "get_tract_by_fips"}
+        assert cached
+        
+        touch(database_copy)
+        client.get("/api/states")
+        assert not cached & set(cache._entries)
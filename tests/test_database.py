@@ -6,14 +6,18 @@ Essential tests for database models and queries
 """
 
 import pytest
-from sqlalchemy import create_engine, inspect
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from backend.database.schema import Base, CensusTract
+from backend.database.schema import Base, CensusTract, TractPercentile
+from backend.database.connection import bulk_load
+from backend.etl.load_database import PERCENTILE_QUERY
 
 
 @pytest.fixture
@@ -73,3 +77,41 @@ class TestDatabase:
         assert isinstance(tract_dict, dict)
         assert tract_dict["state"] == "Georgia"
         assert tract_dict["inclusive_growth_score"] == 75.5
+    
+    def test_columns_match_table(self):
+        """COLUMNS should list every table column in order"""
+        assert CensusTract.COLUMNS == tuple(CensusTract.__table__.columns.keys())
+    
+    def test_bulk_load(self, test_session):
+        """Should bulk insert DataFrame rows with NaN stored as NULL"""
+        df = pd.DataFrame({
+            "census_tract_fips": ["GA001", "TX001"],
+            "county": ["Fulton", "Harris"],
+            "state": ["Georgia", "Texas"],
+            "year": [2023, 2023],
+            "inclusive_growth_score": [75.5, np.nan]
+        })
+        
+        assert bulk_load(df, bind=test_session.get_bind()) == 2
+        
+        tracts = test_session.query(CensusTract).order_by(CensusTract.id).all()
+        assert [t.state for t in tracts] == ["Georgia", "Texas"]
+        assert tracts[1].inclusive_growth_score is None
+    
+    def test_percentile_query(self, test_session):
+        """Should rank scored tracts by the share of lower scores in their state"""
+        df = pd.DataFrame({
+            "census_tract_fips": ["GA001", "GA002", "GA003", "GA004", "GA005", "TX001"],
+            "county": ["Fulton"] * 5 + ["Harris"],
+            "state": ["Georgia"] * 5 + ["Texas"],
+            "year": [2023] * 6,
+            "inclusive_growth_score": [60.0, 70.0, 70.0, 80.0, np.nan, 50.0]
+        })
+        bulk_load(df, bind=test_session.get_bind())
+        
+        test_session.execute(text(PERCENTILE_QUERY))
+        rows = test_session.query(TractPercentile).order_by(TractPercentile.id).all()
+        
+        assert [r.id for r in rows] == [1, 2, 3, 4, 6]
+        assert [r.state_percentile for r in rows] == [0.0, 25.0, 25.0, 75.0, 0.0]
+        assert [r.state_avg for r in rows] == [70.0, 70.0, 70.0, 70.0, 50.0]
@@ -5,10 +5,23 @@ CIS 301 Capstone Project - Clark Atlanta CIS301
 Essential tests for data cleaning and processing
 """
 
+import sqlite3
+from contextlib import closing
+
 import pytest
 import pandas as pd
 import numpy as np
 
+from backend.config import RAW_DATA_PATH
+from backend.etl.data_cleaning import IGSDataCleaner, year_range_and_duplicates
+from backend.etl.run_etl import ETLPipeline
+
+
+def count_tracts(database_path):
+    """Count the rows loaded into a pipeline's database"""
+    with closing(sqlite3.connect(database_path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM tracts").fetchone()[0]
+
 
 class TestDataCleaning:
     """Core ETL tests"""
@@ -65,3 +78,61 @@ class TestDataCleaning:
         assert scores.mean() == 75.0
         assert scores.min() == 60.0
         assert scores.max() == 90.0
+    
+    def test_year_range_and_duplicates(self):
+        """Should find the year range and count every row in a duplicate group"""
+        years = np.array([2017.0, 2017.0, 2020.0, np.nan, 2017.0])
+        fips = np.array([13121001100.0, 13121001100.0, 13121001100.0, 48201001000.0, np.nan])
+        
+        assert year_range_and_duplicates(years, fips) == (2017, 2020, 2)
+    
+    def test_load_raw_data_checks_header(self, temp_csv_file, temp_output_dir):
+        """Should reject a raw file whose header lacks expected columns"""
+        cleaner = IGSDataCleaner(temp_csv_file, f"{temp_output_dir}/cleaned.csv")
+        
+        with pytest.raises(ValueError, match="missing expected columns"):
+            cleaner.load_raw_data()
+    
+    def test_convert_data_types_without_numeric_columns(self):
+        """Should convert a frame that has only identifier columns"""
+        cleaner = IGSDataCleaner("raw.csv", "cleaned.csv")
+        cleaner.df = pd.DataFrame({'State': ['Georgia'], 'Year': ['2023']})
+        
+        df = cleaner.convert_data_types()
+        
+        assert df['Year'].iloc[0] == 2023
+        assert list(df.columns) == ['State', 'Year']
+
+
+class TestETLPipeline:
+    """Overlapped clean-and-load pipeline tests"""
+    
+    def make_pipeline(self, tmp_path):
+        """Pipeline reading the raw dataset and writing under tmp_path"""
+        return ETLPipeline(
+            raw_data_path=str(RAW_DATA_PATH),
+            processed_data_path=str(tmp_path / "cleaned.csv"),
+            database_path=str(tmp_path / "igs_data.db")
+        )
+    
+    def test_pipeline_loads_every_cleaned_row(self, tmp_path):
+        """Should load every cleaned row while the files are written"""
+        pipeline = self.make_pipeline(tmp_path)
+        
+        assert pipeline.run()
+        assert pipeline.stats['status'] == 'success'
+        assert pipeline.stats['records_loaded'] == pipeline.stats['records_cleaned'] > 0
+        assert count_tracts(pipeline.database_path) == pipeline.stats['records_cleaned']
+    
+    def test_pipeline_discards_rows_when_cleaning_fails(self, tmp_path, monkeypatch):
+        """Should commit nothing if cleaning fails after chunks were streamed"""
+        def fail_to_save(self):
+            raise OSError("disk full")
+        
+        # Saving runs after the validated chunks have been handed to the loader
+        monkeypatch.setattr(IGSDataCleaner, "save_cleaned_data", fail_to_save)
+        pipeline = self.make_pipeline(tmp_path)
+        
+        assert not pipeline.run()
+        assert pipeline.stats['status'] == 'failed_cleaning'
+        assert count_tracts(pipeline.database_path) == 0